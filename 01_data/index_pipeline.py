@@ -0,0 +1,536 @@
+"""
+Streaming indexing pipeline: chunk, embed and upsert documents into Weaviate.
+
+Replaces the chunk, embed and index cells of 01_index_data.ipynb. Row groups
+of the selected documents stream through the stages, connected by bounded
+queues, so memory stays flat with corpus size and all stages run concurrently:
+
+    read -> chunk (worker processes) -> embed -> upsert (Weaviate and parquet)
+
+Run from 01_data after creating _data/02_KRP_selec.parq (see the notebook):
+
+    python index_pipeline.py
+    python index_pipeline.py --no-weaviate      # Only write 04_KRP_embed.parq
+    python index_pipeline.py --keep-collection  # Upsert into the existing collection
+
+With --keep-collection, chunks left over from an earlier run of a document (e.g.
+after it re-chunks into fewer pieces) are deleted before its new chunks are upserted.
+"""
+
+import argparse
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import timezone
+from functools import partial
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import chunk_text, config, remove_index_version, write_index_version
+
+_DONE = object()
+
+
+class Channel:
+    """Bounded queue between two stages, closed with a sentinel."""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.maxsize = maxsize
+        self.exhausted = False
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def close(self):
+        self._queue.put(_DONE)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                self.exhausted = True
+                return
+            yield item
+
+    def drain(self):
+        """Discard remaining items so a failed stage does not block its producer."""
+        if not self.exhausted:
+            for _ in self:
+                pass
+
+
+class StageStats:
+    """Items processed and busy time of one pipeline stage."""
+
+    def __init__(self, name, unit, workers=1):
+        self.name = name
+        self.unit = unit
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, items, seconds):
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+
+    def summary(self):
+        end = self.finished or time.perf_counter()
+        wall = end - self.started if self.started else 0.0
+        rate = self.items / wall if wall else 0.0
+        busy = self.busy / (wall * self.workers) * 100 if wall else 0.0
+        return (
+            f"{self.name:<7} {self.items:>10,} {self.unit:<9} in {wall:7.1f}s "
+            f"{rate:10,.1f} {self.unit}/s  busy {busy:3.0f}%"
+        )
+
+
+def chunk_documents(docs, max_token_count, overlap_tokens):
+    """Chunk a batch of documents in a worker process.
+
+    Parameters
+    ----------
+    docs : pd.DataFrame
+        Documents with identifier, text and metadata columns.
+    max_token_count : int
+        The maximum number of tokens per chunk.
+    overlap_tokens : int
+        The number of tokens to overlap between chunks.
+
+    Returns
+    -------
+    tuple
+        The chunks with the document metadata and the time taken in seconds.
+    """
+    start = time.perf_counter()
+    rows = []
+    for doc in docs.itertuples(index=False):
+        chunks = chunk_text(
+            doc, max_token_count=max_token_count, overlap_tokens=overlap_tokens
+        )
+        for i, (identifier, chunk) in enumerate(chunks):
+            rows.append((identifier, i, chunk))
+    chunks = pd.DataFrame(rows, columns=["identifier", "chunk_index", "chunk_text"])
+    chunks = docs.drop(columns=["text"]).merge(chunks, on="identifier")
+    return chunks, time.perf_counter() - start
+
+
+def read_stage(path, batch_size, out, stats, stop):
+    parquet = pq.ParquetFile(path)
+    start = time.perf_counter()
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        if stop.is_set():
+            break
+        docs = batch.to_pandas()
+        stats.add(len(docs), time.perf_counter() - start)
+        out.put(docs)
+        start = time.perf_counter()
+
+
+def chunk_stage(
+    inp, out, stats, executor, max_in_flight, max_token_count, overlap_tokens
+):
+    def collect(done):
+        for future in done:
+            chunks, seconds = future.result()
+            stats.add(len(chunks), seconds)
+            out.put(chunks)
+
+    # Bound the batches handed to the workers; the executor queue is unbounded.
+    pending = set()
+    for docs in inp:
+        pending.add(
+            executor.submit(chunk_documents, docs, max_token_count, overlap_tokens)
+        )
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    collect(wait(pending).done)
+
+
+def embed_stage(inp, out, stats, model, batch_size):
+    for chunks in inp:
+        start = time.perf_counter()
+        failed = chunks["chunk_text"].isna()
+        if failed.any():
+            print(f"Skipping {failed.sum()} chunks that could not be created.")
+            chunks = chunks[~failed]
+        if chunks.empty:
+            continue
+        embeddings = model.encode(
+            chunks["chunk_text"].tolist(),
+            batch_size=batch_size,
+            convert_to_tensor=False,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        chunks = chunks.assign(embeddings=list(embeddings))
+        stats.add(len(chunks), time.perf_counter() - start)
+        out.put(chunks)
+
+
+def chunk_uuid(identifier, chunk_index):
+    """Deterministic UUID, so re-runs replace chunks instead of duplicating them."""
+    from weaviate.util import generate_uuid5
+
+    return generate_uuid5(f"{identifier}:{chunk_index}")
+
+
+def existing_chunks(collection):
+    """Map each identifier in the collection to the UUIDs of its objects.
+
+    Reads the whole collection once with the cursor API, which, unlike offset
+    paging, is not capped at QUERY_MAXIMUM_RESULTS.
+    """
+    existing = defaultdict(set)
+    for obj in collection.iterator(return_properties=["identifier"]):
+        existing[obj.properties["identifier"]].add(str(obj.uuid))
+    return existing
+
+
+def delete_stale_chunks(collection, chunks, existing, page_size=1000):
+    """Delete objects of the documents in chunks that the new chunks do not replace.
+
+    Parameters
+    ----------
+    collection : weaviate.collections.Collection
+        The collection being upserted into.
+    chunks : pd.DataFrame
+        All chunks of the documents about to be upserted.
+    existing : dict
+        Identifiers mapped to UUIDs from existing_chunks; the documents in
+        chunks are removed from it.
+    page_size : int, optional
+        Maximum number of objects deleted per request.
+
+    Returns
+    -------
+    int
+        The number of deleted objects.
+    """
+    from weaviate.classes.query import Filter
+
+    fresh = {
+        str(chunk_uuid(identifier, chunk_index))
+        for identifier, chunk_index in zip(chunks["identifier"], chunks["chunk_index"])
+    }
+    stale = [
+        uuid
+        for identifier in set(chunks["identifier"])
+        for uuid in existing.pop(identifier, ())
+        if uuid not in fresh
+    ]
+    for start in range(0, len(stale), page_size):
+        collection.data.delete_many(
+            where=Filter.by_id().contains_any(stale[start : start + page_size])
+        )
+    return len(stale)
+
+
+def add_objects(batch, chunks):
+    """Queue chunks with their vectors in a Weaviate batch."""
+    dates = pd.to_datetime(chunks["date"])
+    for row, date in zip(chunks.itertuples(index=False), dates):
+        properties = {
+            "identifier": row.identifier,
+            "title": row.title,
+            "text": row.chunk_text,
+            "date": date.to_pydatetime().replace(tzinfo=timezone.utc),
+            "token_count": int(row.token_count),
+        }
+        uuid = chunk_uuid(row.identifier, row.chunk_index)
+        batch.add_object(
+            properties=properties, vector=row.embeddings.tolist(), uuid=uuid
+        )
+
+
+def upsert_stage(
+    inp,
+    stats,
+    embeddings_file,
+    collection,
+    batch_size,
+    concurrent_requests,
+    replace=False,
+):
+    writer = None
+    deleted = 0
+    existing = None
+    if replace and collection is not None:
+        existing = existing_chunks(collection)
+        print(f"Found {len(existing):,} documents already in the collection.")
+    batching = (
+        collection.batch.fixed_size(
+            batch_size=batch_size, concurrent_requests=concurrent_requests
+        )
+        if collection is not None
+        else nullcontext()
+    )
+    try:
+        with batching as batch:
+            for chunks in inp:
+                start = time.perf_counter()
+                table = pa.Table.from_pandas(
+                    chunks.drop(columns=["chunk_index"]), preserve_index=False
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(embeddings_file, table.schema)
+                writer.write_table(table.cast(writer.schema))
+
+                if batch is not None:
+                    if existing is not None:
+                        deleted += delete_stale_chunks(collection, chunks, existing)
+                    add_objects(batch, chunks)
+                stats.add(len(chunks), time.perf_counter() - start)
+            # Leaving the batch context flushes the remaining objects.
+            start = time.perf_counter()
+        stats.add(0, time.perf_counter() - start)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if deleted:
+        print(f"Deleted {deleted:,} stale chunks of re-indexed documents.")
+    if collection is not None and collection.batch.failed_objects:
+        failed = collection.batch.failed_objects
+        raise RuntimeError(
+            f"{len(failed)} objects failed to index, e.g. {failed[0].message}"
+        )
+
+
+def run_pipeline(args, model, collection):
+    """Run all stages concurrently and return their stats and any errors."""
+    stop = threading.Event()
+    errors = []
+    stats = {
+        "read": StageStats("read", "documents"),
+        "chunk": StageStats("chunk", "chunks", workers=args.chunk_workers),
+        "embed": StageStats("embed", "chunks"),
+        "upsert": StageStats("upsert", "chunks"),
+    }
+    documents = Channel(args.queue_size)
+    chunks = Channel(args.queue_size)
+    embedded = Channel(args.queue_size)
+
+    def run_stage(name, fn, inp, out):
+        stats[name].started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            errors.append(f"{name}: {e!r}")
+            stop.set()
+            if inp is not None:
+                inp.drain()
+        finally:
+            stats[name].finished = time.perf_counter()
+            if out is not None:
+                out.close()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.chunk_workers, mp_context=context) as executor:
+        stages = [
+            (
+                "read",
+                partial(
+                    read_stage,
+                    args.input,
+                    args.read_batch_size,
+                    documents,
+                    stats["read"],
+                    stop,
+                ),
+                None,
+                documents,
+            ),
+            (
+                "chunk",
+                partial(
+                    chunk_stage,
+                    documents,
+                    chunks,
+                    stats["chunk"],
+                    executor,
+                    max_in_flight=args.chunk_workers * 2,
+                    max_token_count=args.max_token_count,
+                    overlap_tokens=args.overlap_tokens,
+                ),
+                documents,
+                chunks,
+            ),
+            (
+                "embed",
+                partial(
+                    embed_stage,
+                    chunks,
+                    embedded,
+                    stats["embed"],
+                    model,
+                    batch_size=args.embed_batch_size,
+                ),
+                chunks,
+                embedded,
+            ),
+            (
+                "upsert",
+                partial(
+                    upsert_stage,
+                    embedded,
+                    stats["upsert"],
+                    args.output,
+                    collection,
+                    batch_size=args.weaviate_batch_size,
+                    concurrent_requests=args.weaviate_concurrent_requests,
+                    replace=args.keep_collection,
+                ),
+                embedded,
+                None,
+            ),
+        ]
+        threads = [
+            threading.Thread(target=run_stage, args=stage, name=stage[0], daemon=True)
+            for stage in stages
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Progress with queue fill levels: a full queue sits before the bottleneck.
+        while any(thread.is_alive() for thread in threads):
+            threads[-1].join(timeout=args.report_interval)
+            if threads[-1].is_alive():
+                progress = " | ".join(
+                    f"{name} {s.items:,}" for name, s in stats.items()
+                )
+                queues = " ".join(
+                    f"{c.qsize()}/{c.maxsize}" for c in (documents, chunks, embedded)
+                )
+                print(f"{progress} | queues {queues}")
+    return stats, errors
+
+
+def create_collection(client, collection_name):
+    """(Re-)create the collection with the properties the app searches on."""
+    import weaviate.classes as wvc
+    import weaviate.classes.config as wc
+    from weaviate.classes.config import DataType, Property
+
+    if client.collections.exists(collection_name):
+        client.collections.delete(collection_name)
+    client.collections.create(
+        collection_name,
+        vectorizer_config=wc.Configure.Vectorizer.none(),
+        inverted_index_config=wvc.config.Configure.inverted_index(
+            bm25_b=0.75,
+            bm25_k1=1.2,
+        ),
+        properties=[
+            Property(name="identifier", data_type=DataType.TEXT),
+            Property(name="title", data_type=DataType.TEXT),
+            Property(name="text", data_type=DataType.TEXT),
+            # Metadata for filtered search.
+            Property(name="date", data_type=DataType.DATE),
+            Property(name="token_count", data_type=DataType.INT),
+        ],
+    )
+
+
+def parse_args():
+    settings = config["pipeline"]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", default=settings["input_file"])
+    parser.add_argument("--output", default=settings["embeddings_file"])
+    parser.add_argument("--model", default=settings["model_path"])
+    parser.add_argument("--device", default=settings["device"])
+    parser.add_argument(
+        "--read-batch-size", type=int, default=settings["read_batch_size"]
+    )
+    parser.add_argument("--chunk-workers", type=int, default=settings["chunk_workers"])
+    parser.add_argument(
+        "--max-token-count", type=int, default=settings["max_token_count"]
+    )
+    parser.add_argument(
+        "--overlap-tokens", type=int, default=settings["overlap_tokens"]
+    )
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=settings["embed_batch_size"]
+    )
+    parser.add_argument("--queue-size", type=int, default=settings["queue_size"])
+    parser.add_argument(
+        "--weaviate-batch-size", type=int, default=settings["weaviate_batch_size"]
+    )
+    parser.add_argument(
+        "--weaviate-concurrent-requests",
+        type=int,
+        default=settings["weaviate_concurrent_requests"],
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=settings["report_interval"]
+    )
+    parser.add_argument(
+        "--no-weaviate", action="store_true", help="Only write the parquet."
+    )
+    parser.add_argument(
+        "--keep-collection",
+        action="store_true",
+        help="Upsert into the existing collection instead of re-creating it.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    from sentence_transformers import SentenceTransformer
+
+    start = time.perf_counter()
+    model = SentenceTransformer(args.model, trust_remote_code=True, device=args.device)
+    print(f"Loaded {args.model} on {args.device} in {time.perf_counter() - start:.1f}s")
+
+    client = None
+    collection = None
+    collection_name = config["weaviate"]["collection_name"]
+    if not args.no_weaviate:
+        import weaviate
+
+        client = weaviate.connect_to_local(
+            port=config["weaviate"]["port"], grpc_port=config["weaviate"]["grpc_port"]
+        )
+        # Invalidate cached search results first, in case the run fails halfway.
+        remove_index_version()
+        if not args.keep_collection:
+            create_collection(client, collection_name)
+        collection = client.collections.get(collection_name)
+
+    try:
+        stats, errors = run_pipeline(args, model, collection)
+        print("\nThroughput per stage:")
+        for stage_stats in stats.values():
+            print(stage_stats.summary())
+
+        if errors:
+            for error in errors:
+                print(f"Stage failed: {error}")
+            sys.exit(1)
+
+        if collection is not None:
+            total = collection.aggregate.over_all(total_count=True).total_count
+            print(f"Collection {collection_name} holds {total:,} objects.")
+            # Mark the new index version so the app invalidates its cached search results.
+            write_index_version(collection_name, total)
+    finally:
+        if client is not None:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+import json
 import re
+import uuid
+from datetime import datetime
 import pandas as pd
 import spacy
 from transformers import AutoTokenizer
@@ -15,6 +18,52 @@ def load_config():
 config = load_config()
 
 
+def write_index_version(collection_name, object_count, path="_data/index_version.json"):
+    """Write a new index version marker after (re-)indexing a collection.
+
+    The app keys its search result cache on this version, so writing a new
+    marker invalidates all cached search results.
+
+    Parameters
+    ----------
+    collection_name : str
+        Name of the indexed Weaviate collection.
+    object_count : int
+        Number of indexed objects.
+    path : str, optional
+        Location of the marker, by default "_data/index_version.json".
+
+    Returns
+    -------
+    dict
+        The written marker.
+    """
+    marker = {
+        "collection_name": collection_name,
+        "version": uuid.uuid4().hex,
+        "indexed_at": datetime.now().isoformat(timespec="seconds"),
+        "object_count": object_count,
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(marker, f, indent=2)
+    return marker
+
+
+def remove_index_version(path="_data/index_version.json"):
+    """Remove the index version marker before a collection is modified.
+
+    Without a marker the app bypasses its search result cache, so results of
+    a collection that is being (re-)indexed, or failed to, are never served.
+
+    Parameters
+    ----------
+    path : str, optional
+        Location of the marker, by default "_data/index_version.json".
+    """
+    Path(path).unlink(missing_ok=True)
+
+
 nlp = spacy.load(
     "de_core_news_lg",
     disable=["ner", "tagger", "morphologizer", "attribute_ruler", "lemmatizer"],
@@ -0,0 +1,72 @@
+import atexit
+import gzip
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Optional
+from _core.config import config
+from _core.logger import custom_logger
+
+
+def resolve_save_dir() -> Path:
+    """Resolve the directory for final docs and raw responses, creating it if needed."""
+    cfg_path = Path(config["app"]["save_final_docs_to"])
+    app_base = Path(__file__).resolve().parents[2]  # .../deep-research/
+    save_dir = cfg_path if cfg_path.is_absolute() else (app_base / cfg_path)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    return save_dir
+
+
+class ArtifactWriter:
+    """Writes JSON artifacts on a background thread so disk I/O stays off the request path."""
+
+    def __init__(self, compress: bool = True, max_pending: int = 100):
+        self.compress = compress
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path, data: Any, **json_kwargs) -> Path:
+        """
+        Queue data to be written as JSON to path.
+
+        With compression enabled, ".gz" is appended to the file name.
+
+        Returns:
+            Path: The path the artifact will be written to.
+        """
+        if self.compress:
+            path = path.with_name(path.name + ".gz")
+        self._ensure_started()
+        self._queue.put((path, data, json_kwargs))
+        return path
+
+    def flush(self) -> None:
+        """Block until all queued artifacts are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="artifact-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            path, data, json_kwargs = self._queue.get()
+            try:
+                opener = gzip.open if self.compress else open
+                with opener(path, "wt", encoding="utf-8") as f:
+                    json.dump(data, f, **json_kwargs)
+            except Exception as e:
+                custom_logger.error(f"Error writing artifact {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+artifact_writer = ArtifactWriter(compress=config["app"]["compress_artifacts"])
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from _core.config import config
+from _core.logger import custom_logger
+
+
+def make_cache_key(**parts: Any) -> str:
+    """Hash the given request parts into a stable, content-addressed key."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resolve_cache_path(path: str) -> str:
+    """Resolve a relative cache path against the repository root."""
+    base = Path(__file__).resolve().parents[2]  # .../deep-research/
+    return str(base / path)
+
+
+class ResponseCache:
+    """
+    Disk-backed key-value cache stored in SQLite with size and age based eviction.
+
+    Reads do not write: access times of hits are buffered in memory and written
+    together with the next write, eviction or every _FLUSH_ACCESS_EVERY hits.
+    """
+
+    # Evict only every n writes to keep the write path cheap.
+    _EVICT_EVERY = 100
+    _FLUSH_ACCESS_EVERY = 100
+
+    def __init__(
+        self,
+        path: str,
+        max_size_mb: float,
+        max_age_days: float,
+    ):
+        self.path = path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets several app processes read while one writes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode, NORMAL skips the fsync per commit and is still corruption-safe.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @classmethod
+    def from_config(cls, section: str = "cache") -> Optional["ResponseCache"]:
+        """Create a cache from the given config section, or None if disabled."""
+        cache_config = config.get(section, {})
+        if not cache_config.get("enabled", False):
+            return None
+        try:
+            return cls(
+                path=resolve_cache_path(cache_config["path"]),
+                max_size_mb=cache_config["max_size_mb"],
+                max_age_days=cache_config["max_age_days"],
+            )
+        except sqlite3.Error as e:
+            custom_logger.error(f"Could not open cache at {cache_config['path']}: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._accessed[key] = now
+            if len(self._accessed) >= self._FLUSH_ACCESS_EVERY:
+                self._flush_accessed()
+                self._conn.commit()
+            return row[0]
+
+    def _flush_accessed(self) -> None:
+        """Write buffered access times. Caller holds the lock and commits."""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            self._conn.commit()
+            self._writes += 1
+            evict = self._writes % self._EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        with self._lock:
+            self._flush_accessed()
+            self._conn.execute(
+                "DELETE FROM entries WHERE created < ?",
+                (time.time() - self.max_age_seconds,),
+            )
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+            if total > self.max_size_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed ASC"
+                ).fetchall()
+                to_delete = []
+                for key, size in rows:
+                    if total <= self.max_size_bytes:
+                        break
+                    to_delete.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", to_delete)
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
@@ -50,14 +50,21 @@ class Config:
                             k, v = s.split("=", 1)
                             os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
             self._env_loaded = True
+        self._env_path = env_path
 
-        # Validate required env vars (defaults to OPENROUTER_API_KEY)
+    def validate_env(self):
+        """
+        Raise if required env vars (defaults to OPENROUTER_API_KEY) are missing.
+
+        Called when a client that needs them is created, so that modules can be
+        imported without credentials.
+        """
         required = self._config.get("api_keys", {}).get("required", ["OPENROUTER_API_KEY"])
         missing = [k for k in required if not os.getenv(k)]
         if missing:
             raise RuntimeError(
                 f"Missing required environment variables: {', '.join(missing)}. "
-                f"Expected in {env_path}"
+                f"Expected in {self._env_path}"
             )
 
     def __getitem__(self, key):
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Tuple, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from _core.config import config
+from _core.startup import startup_timer
 
 
 class BaseEmbeddingManager(ABC):
@@ -18,25 +22,93 @@ class BaseEmbeddingManager(ABC):
         pass
 
 
-class SentenceTransformerEmbeddingManager(BaseEmbeddingManager):
-    """Manages text embedding operations using Sentence Transformers models."""
+class CachedEmbeddingManager(BaseEmbeddingManager):
+    """
+    Embedding manager with a bounded LRU of embeddings.
 
-    def __init__(self):
-        """Initialize the embedding manager."""
-        self._model: SentenceTransformer = SentenceTransformer(
-            model_name_or_path=config["sentence_transformers"]["model_path"]
-        )
+    Subclasses implement _encode; embed only encodes texts missing from the cache.
+    """
+
+    def __init__(self, cache_namespace: str):
+        # Bounded LRU of embeddings keyed on (namespace, normalize flag, text).
+        self._cache_namespace = cache_namespace
+        self._cache: OrderedDict[Tuple[str, bool, str], np.ndarray] = OrderedDict()
+        self._cache_size = config["sentence_transformers"]["cache_size"]
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _encode(self, texts: List[str], normalize: bool) -> np.ndarray:
+        """Encode texts without the cache."""
+        pass
 
     def embed(
         self,
         texts: Union[str, List[str]],
         normalize: bool = True,
     ) -> np.ndarray:
-        """Generate embeddings for input text(s)."""
+        """Generate embeddings for input text(s), encoding only texts not in the cache."""
         # Ensure texts is a list
         if isinstance(texts, str):
             texts = [texts]
+        if not texts:
+            return self._encode(texts, normalize)
+
+        rows: List[np.ndarray | None] = [None] * len(texts)
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                key = (self._cache_namespace, normalize, text)
+                row = self._cache.get(key)
+                if row is None:
+                    self.misses += 1
+                    continue
+                self._cache.move_to_end(key)
+                rows[i] = row
+                self.hits += 1
+
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = dict(zip(unique_texts, self._encode(unique_texts, normalize)))
+            for i in missing:
+                rows[i] = encoded[texts[i]]
+
+            with self._cache_lock:
+                for text, row in encoded.items():
+                    self._cache[(self._cache_namespace, normalize, text)] = row
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.vstack(rows)
+
+    def cache_stats(self) -> dict:
+        """Return hit/miss counters, hit rate and size of the embedding cache."""
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._cache),
+            }
+
 
+class SentenceTransformerEmbeddingManager(CachedEmbeddingManager):
+    """Manages text embedding operations using Sentence Transformers models."""
+
+    def __init__(self):
+        """Initialize the embedding manager."""
+        # Imported here so that the ONNX backend does not load torch.
+        from sentence_transformers import SentenceTransformer
+
+        self._model_path = config["sentence_transformers"]["model_path"]
+        super().__init__(cache_namespace=self._model_path)
+        self._model: SentenceTransformer = SentenceTransformer(
+            model_name_or_path=self._model_path
+        )
+
+    def _encode(self, texts: List[str], normalize: bool) -> np.ndarray:
         try:
             embeddings = self._model.encode(
                 texts,
@@ -49,4 +121,138 @@ class SentenceTransformerEmbeddingManager(BaseEmbeddingManager):
             raise RuntimeError(f"Embedding failed: {e}") from e
 
 
-st_encoder = SentenceTransformerEmbeddingManager()
+def resolve_onnx_model_dir() -> Path:
+    """Directory of the exported ONNX model, relative to the repository root."""
+    base = Path(__file__).resolve().parents[2]  # .../deep-research/
+    return base / config["sentence_transformers"]["onnx_model_dir"]
+
+
+class OnnxEmbeddingManager(CachedEmbeddingManager):
+    """
+    Embeds text with an int8-quantized ONNX export of the Sentence Transformers model.
+
+    Runs on ONNX Runtime with the model's own tokenizer, mean pooling and L2
+    normalization, so it needs neither torch nor sentence-transformers.
+    Export the model with `python export_onnx_encoder.py export`.
+    """
+
+    def __init__(self, model_dir: Path = None):
+        """Initialize the embedding manager."""
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        st_config = config["sentence_transformers"]
+        self._model_dir = Path(model_dir or resolve_onnx_model_dir())
+        model_file = self._model_dir / "model_quantized.onnx"
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_file}. "
+                "Run `python export_onnx_encoder.py export` in 02_app first."
+            )
+        super().__init__(cache_namespace=f"onnx:{self._model_dir.name}")
+
+        self._batch_size = st_config["onnx_batch_size"]
+        self._tokenizer = Tokenizer.from_file(str(self._model_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=st_config["max_seq_length"])
+        self._tokenizer.enable_padding(
+            pad_id=self._tokenizer.token_to_id("<pad>"), pad_token="<pad>"
+        )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = st_config["onnx_threads"] or os.cpu_count()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._dimension = self._session.get_outputs()[0].shape[-1]
+
+    def _encode(self, texts: List[str], normalize: bool) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        try:
+            batches = [
+                self._encode_batch(texts[i : i + self._batch_size], normalize)
+                for i in range(0, len(texts), self._batch_size)
+            ]
+            return np.vstack(batches)
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+
+    def _encode_batch(self, texts: List[str], normalize: bool) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [e.attention_mask for e in encodings], dtype=np.int64
+        )
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self._session.run(None, inputs)[0]
+        # Mean pooling over non-padding tokens, as configured for e5 models.
+        mask = attention_mask[..., None].astype(np.float32)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = (hidden * mask).sum(axis=1) / counts
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+class RemoteEmbeddingManager(CachedEmbeddingManager):
+    """
+    Embeds text through the shared embedding server (embedding_server.py).
+
+    The server holds the only model instance and batches requests of all app
+    workers. Embeddings are still cached locally.
+    """
+
+    def __init__(self, url: str = None):
+        """Initialize the embedding manager."""
+        import requests
+
+        server_config = config["embedding_server"]
+        self._url = url or f"http://{server_config['host']}:{server_config['port']}"
+        super().__init__(cache_namespace=f"remote:{server_config['backend']}")
+        self._timeout = server_config["request_timeout"]
+        self._session = requests.Session()
+
+    def _encode(self, texts: List[str], normalize: bool) -> np.ndarray:
+        try:
+            response = self._session.post(
+                f"{self._url}/embed",
+                json={"texts": texts, "normalize": normalize},
+                timeout=self._timeout,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+        shape = tuple(int(d) for d in response.headers["X-Embedding-Shape"].split(","))
+        return np.frombuffer(response.content, dtype=np.float32).reshape(shape)
+
+
+def create_encoder(backend: str = None) -> BaseEmbeddingManager:
+    """Create the embedding manager configured in `sentence_transformers.backend`."""
+    backend = backend or config["sentence_transformers"]["backend"]
+    if backend == "torch":
+        return SentenceTransformerEmbeddingManager()
+    if backend == "onnx":
+        return OnnxEmbeddingManager()
+    if backend == "remote":
+        return RemoteEmbeddingManager()
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder() -> BaseEmbeddingManager:
+    """Return the shared embedding manager, creating it on first use."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            with startup_timer.timed("embeddings"):
+                _encoder = create_encoder()
+        return _encoder
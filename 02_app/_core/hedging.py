@@ -0,0 +1,186 @@
+import asyncio
+import threading
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import numpy as np
+from _core.config import config
+from _core.rate_limit import RequestTimer, request_timer
+
+
+class LatencyTracker:
+    """Rolling window of observed call latencies per key."""
+
+    def __init__(self, window: int = 200):
+        self._latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies[key].append(seconds)
+
+    def percentile(self, key: str, q: float, min_samples: int) -> Optional[float]:
+        """Return the q-th percentile for key, or None with fewer than min_samples."""
+        with self._lock:
+            samples = list(self._latencies[key])
+        if len(samples) < min_samples:
+            return None
+        return float(np.percentile(samples, q))
+
+
+class Hedger:
+    """
+    Issues a duplicate request when a call is slower than usual.
+
+    If a call has not returned after the configured percentile of observed
+    latencies, a hedge is sent, optionally to an alternate model. Whichever
+    finishes first wins and the other is cancelled.
+
+    No hedge is sent while the concurrency window of either model is full or
+    paused by Retry-After: the call is then most likely waiting for a slot, and
+    a duplicate would only add load while the provider throttles.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_samples: int,
+        min_delay: float,
+        alternate_model: Optional[str] = None,
+        tracker: Optional[LatencyTracker] = None,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.alternate_model = alternate_model
+        self.tracker = tracker or LatencyTracker()
+        self.fired = 0
+        self.won = 0
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls) -> Optional["Hedger"]:
+        """Create a hedger from config, or None if hedging is disabled."""
+        hedge_config = config["hedging"]
+        if not hedge_config["enabled"]:
+            return None
+        alternate_key = hedge_config.get("alternate_model")
+        return cls(
+            percentile=hedge_config["percentile"],
+            min_samples=hedge_config["min_samples"],
+            min_delay=hedge_config["min_delay"],
+            alternate_model=config["models"][alternate_key] if alternate_key else None,
+        )
+
+    async def run(
+        self,
+        llm_function: Callable[..., Awaitable[Any]],
+        prompt: str,
+        **llm_kwargs,
+    ) -> Any:
+        """Call llm_function(prompt, **llm_kwargs) with hedging."""
+        key = f"{llm_kwargs.get('step')}:{llm_kwargs.get('model_id')}"
+        delay = self.tracker.percentile(key, self.percentile, self.min_samples)
+        # Cache hits return almost instantly and would otherwise pull the delay to zero.
+        if delay is not None:
+            delay = max(delay, self.min_delay)
+
+        # Latencies are observed from when a request got its slot, so queueing
+        # behind a saturated controller does not inflate the hedge delay.
+        primary, primary_timer = self._start(llm_function, prompt, llm_kwargs)
+        if delay is None:
+            result = await primary
+            self.tracker.observe(key, primary_timer.elapsed())
+            return result
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            result = primary.result()
+            self.tracker.observe(key, primary_timer.elapsed())
+            return result
+
+        # The duplicate must not join the primary's single-flight.
+        hedge_kwargs = {**llm_kwargs, "dedupe": False}
+        if self.alternate_model:
+            hedge_kwargs["model_id"] = self.alternate_model
+        if self._throttled(llm_kwargs.get("model_id"), hedge_kwargs.get("model_id")):
+            self.suppressed += 1
+            result = await primary
+            self.tracker.observe(key, primary_timer.elapsed())
+            return result
+        hedge, hedge_timer = self._start(llm_function, prompt, hedge_kwargs)
+        timers = {primary: primary_timer, hedge: hedge_timer}
+        self.fired += 1
+
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return self._finish(
+                            task,
+                            task is hedge,
+                            key,
+                            timers[task],
+                            llm_kwargs,
+                            bool(pending),
+                        )
+                # Fall back to the other request if the first one failed.
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    def _start(
+        llm_function: Callable[..., Awaitable[Any]], prompt: str, llm_kwargs: dict
+    ) -> Tuple[asyncio.Future, RequestTimer]:
+        """Schedule the call with a timer that the controller starts on its slot."""
+        timer = RequestTimer()
+        token = request_timer.set(timer)
+        try:
+            # The task copies the current context, and with it the timer.
+            task = asyncio.ensure_future(llm_function(prompt, **llm_kwargs))
+        finally:
+            request_timer.reset(token)
+        return task, timer
+
+    @staticmethod
+    def _throttled(*model_ids: Optional[str]) -> bool:
+        # Imported here to avoid a circular import at module load.
+        from _core.llm_client import ClientManager
+
+        controller = ClientManager.get_controller()
+        default_model = config["models"]["performance_low"]
+        return any(
+            controller.is_saturated(model_id or default_model) for model_id in model_ids
+        )
+
+    def _finish(
+        self,
+        task: asyncio.Future,
+        won: bool,
+        key: str,
+        timer: RequestTimer,
+        llm_kwargs: dict,
+        loser_cancelled: bool,
+    ) -> Any:
+        self.won += int(won)
+        self.tracker.observe(key, timer.elapsed())
+        ledger = llm_kwargs.get("ledger")
+        if ledger is not None:
+            ledger.record_hedge(llm_kwargs.get("step"), won, loser_cancelled)
+        return task.result()
+
+    def stats(self) -> dict:
+        """Return how often hedges fired, won and were suppressed by throttling."""
+        return {"fired": self.fired, "won": self.won, "suppressed": self.suppressed}
+
+
+hedger = Hedger.from_config()
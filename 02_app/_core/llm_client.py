@@ -1,15 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator
+import asyncio
 import os
+import time
+import atexit
+import threading
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from datetime import datetime
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 from dotenv import load_dotenv
 from _core.config import config
 from _core.logger import custom_logger
-from _core.utils import TokenCounter
+from _core.utils import TokenCounter, run_async
+from _core.cache import ResponseCache, make_cache_key
+from _core.rate_limit import ConcurrencyController, wait_retry_after
+from _core.singleflight import SingleFlight
+from _core.usage import UsageLedger, record_usage
+from _core.artifacts import artifact_writer, resolve_save_dir
+from _core.startup import startup_timer
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 
 try:
@@ -20,6 +35,64 @@ except Exception as e:
     custom_logger.info_console(f"Error loading .env file: {e}")
 
 
+class ReasoningStream:
+    """
+    Iterator over the text deltas of a streamed reasoning call.
+
+    After iteration, `text` holds the full response and `usage` the token usage
+    reported by the provider, extended with time to first token and tokens per second.
+    If the stream broke off, `error` holds the exception and `text` is incomplete.
+    `usage["model"]` is the model that answered, e.g. the fallback model.
+    """
+
+    def __init__(
+        self,
+        events: Iterable[dict],
+        model: Optional[str] = None,
+        on_complete: Optional[Callable[["ReasoningStream"], None]] = None,
+    ):
+        self._events = events
+        self._on_complete = on_complete
+        self.model = model
+        self.text = ""
+        self.usage: dict = {}
+        self.error: Optional[Exception] = None
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        first_token_at = None
+        try:
+            for event in self._events:
+                if event.get("model"):
+                    self.model = event["model"]
+                if event.get("usage"):
+                    self.usage = dict(event["usage"])
+                for choice in event.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    self.text += delta
+                    yield delta
+        except Exception as e:
+            self.error = e
+            custom_logger.info_console(f"Error during final reasoning stream: {e}")
+
+        duration = time.perf_counter() - start
+        if self.model:
+            self.usage["model"] = self.model
+        if first_token_at is not None:
+            self.usage["time_to_first_token"] = round(first_token_at - start, 3)
+        self.usage["generation_time"] = round(duration, 3)
+        completion_tokens = self.usage.get("completion_tokens")
+        if completion_tokens and duration > 0:
+            self.usage["tokens_per_second"] = round(completion_tokens / duration, 1)
+
+        if self._on_complete is not None:
+            self._on_complete(self)
+
+
 class LLMClient(ABC):
     """Abstract base class for LLM clients."""
 
@@ -40,24 +113,91 @@ class LLMClient(ABC):
         """Call LLM API with reasoning parameters."""
         pass
 
+    @abstractmethod
+    def stream_with_reasoning(self, prompt: str, **kwargs) -> ReasoningStream:
+        """Call LLM API with reasoning parameters and stream the response."""
+        pass
+
+    @abstractmethod
+    async def acall(self, prompt: str, **kwargs) -> str:
+        """Make a standard async call to the LLM."""
+        pass
+
+    @abstractmethod
+    async def acall_structured(
+        self, prompt: str, json_schema: Dict[str, Any], **kwargs
+    ) -> str:
+        """Make an async call to the LLM and retrieve a structured response."""
+        pass
+
+    @abstractmethod
+    async def acall_with_reasoning(self, prompt: str, **kwargs) -> tuple[str, dict]:
+        """Call LLM API asynchronously with reasoning parameters."""
+        pass
+
 
 class OpenRouterClient(LLMClient):
     """OpenRouter API client implementation."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        controller: Optional[ConcurrencyController] = None,
+        singleflight: Optional[SingleFlight] = None,
+    ):
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
             raise ValueError("OpenRouter API key not found")
 
+        # Shared adaptive concurrency control. Retries are left to tenacity so that
+        # every attempt, including throttled ones, passes through the controller.
+        self.controller = controller or ConcurrencyController.from_config()
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1", api_key=self.api_key
+            base_url=OPENROUTER_BASE_URL, api_key=self.api_key, max_retries=0
+        )
+
+        # Pooled session for reasoning calls with connect/read deadlines. Only
+        # connection errors and gateway failures are retried at transport level.
+        self._reasoning_timeout = (
+            config["llm"]["reasoning_connect_timeout"],
+            config["llm"]["reasoning_read_timeout"],
+        )
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_maxsize=config["llm"]["max_keepalive_connections"],
+                max_retries=Retry(
+                    total=config["llm"]["reasoning_retries"],
+                    connect=config["llm"]["reasoning_retries"],
+                    read=0,
+                    status=config["llm"]["reasoning_retries"],
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=None,
+                    backoff_factor=config["llm"]["reasoning_retry_backoff"],
+                    raise_on_status=False,
+                ),
+            ),
         )
 
+        # Async client on one pooled HTTP/2 connection pool. It is created lazily
+        # and must only be used from the shared event loop (see utils.run_async).
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._aclient: Optional[AsyncOpenAI] = None
+
+        # Persistent response cache for call/call_structured (None if disabled).
+        self.cache = ResponseCache.from_config()
+        # Identical requests in flight at the same time share one HTTP call.
+        self.singleflight = singleflight or SingleFlight()
+
         # Retry configuration
         self.retry_decorator = retry(
-            wait=wait_random_exponential(
-                multiplier=config["llm"]["tenacity_wait_multiplier"],
-                max=config["llm"]["tenacity_wait_max"],
+            wait=wait_retry_after(
+                wait_random_exponential(
+                    multiplier=config["llm"]["tenacity_wait_multiplier"],
+                    max=config["llm"]["tenacity_wait_max"],
+                ),
+                max_wait=config["rate_limit"]["max_retry_after"],
             ),
             stop=stop_after_attempt(config["llm"]["tenacity_stop_attempts"]),
         )
@@ -66,6 +206,60 @@ class OpenRouterClient(LLMClient):
     def _retry(self):
         return self.retry_decorator
 
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """Async OpenAI-compatible client sharing the pooled HTTP connections."""
+        if self._aclient is None:
+            self._http_client = httpx.AsyncClient(
+                http2=config["llm"]["http2"],
+                limits=httpx.Limits(
+                    max_connections=config["llm"]["max_connections"],
+                    max_keepalive_connections=config["llm"][
+                        "max_keepalive_connections"
+                    ],
+                ),
+                timeout=httpx.Timeout(config["llm"]["request_timeout"]),
+            )
+            self._aclient = AsyncOpenAI(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=self.api_key,
+                http_client=self._http_client,
+                max_retries=0,
+            )
+            atexit.register(self._close_async_client)
+        return self._aclient
+
+    def _request_key(self, **parts) -> str:
+        """Content-addressed key for a request, used by the cache and single-flight."""
+        return make_cache_key(**parts)
+
+    def _get_cached(self, key: str, use_cache: bool) -> Optional[str]:
+        if not use_cache or self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _set_cached(self, key: str, value: Optional[str], use_cache: bool) -> None:
+        if use_cache and self.cache is not None and value:
+            self.cache.set(key, value)
+
+    # The async variants keep SQLite I/O off the shared event loop.
+    async def _aget_cached(self, key: str, use_cache: bool) -> Optional[str]:
+        if not use_cache or self.cache is None:
+            return None
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _aset_cached(
+        self, key: str, value: Optional[str], use_cache: bool
+    ) -> None:
+        if use_cache and self.cache is not None and value:
+            await asyncio.to_thread(self.cache.set, key, value)
+
+    def _close_async_client(self):
+        try:
+            run_async(self._http_client.aclose())
+        except Exception as e:
+            custom_logger.error(f"Error closing async HTTP client: {e}")
+
     def call(
         self,
         prompt: str,
@@ -73,23 +267,60 @@ class OpenRouterClient(LLMClient):
         temperature: float = None,
         max_tokens: int = None,
         reasoning_effort: Optional[str] = None,
+        use_cache: bool = True,
+        ledger: Optional[UsageLedger] = None,
+        step: Optional[str] = None,
+        dedupe: bool = True,
         **kwargs,
     ) -> str:
         """Make a standard call to OpenRouter."""
+        model_id = model_id or config["models"]["performance_low"]
+        temperature = temperature or config["temperature"]["low"]
+        max_tokens = max_tokens or config["llm"]["max_tokens_output"]
+        key = self._request_key(
+            model_id=model_id,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            reasoning_effort=reasoning_effort,
+            **kwargs,
+        )
+        cached = self._get_cached(key, use_cache)
+        if cached is not None:
+            record_usage(ledger, step, model_id, cache_hit=True)
+            return cached
 
         @self._retry
         def _call():
-            completion = self.client.chat.completions.create(
-                model=model_id or config["models"]["performance_low"],
-                temperature=temperature or config["temperature"]["low"],
-                max_tokens=max_tokens or config["llm"]["max_tokens_output"],
-                reasoning_effort=reasoning_effort,
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs,
+            start = time.perf_counter()
+            with self.controller.slot(model_id):
+                completion = self.client.chat.completions.create(
+                    model=model_id,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    reasoning_effort=reasoning_effort,
+                    messages=[{"role": "user", "content": prompt}],
+                    # Ask OpenRouter to report token usage including cost.
+                    extra_body={"usage": {"include": True}},
+                    **kwargs,
+                )
+            record_usage(
+                ledger,
+                step,
+                model_id,
+                completion.usage,
+                latency=time.perf_counter() - start,
             )
             return completion.choices[0].message.content.strip()
 
-        return _call()
+        def _fetch():
+            result = _call()
+            self._set_cached(key, result, use_cache)
+            return result
+
+        if not dedupe:
+            return _fetch()
+        return self.singleflight.do(key, _fetch)
 
     def call_structured(
         self,
@@ -99,36 +330,75 @@ class OpenRouterClient(LLMClient):
         temperature: float = None,
         max_tokens: int = None,
         system_message: str = None,
+        use_cache: bool = True,
+        ledger: Optional[UsageLedger] = None,
+        step: Optional[str] = None,
+        dedupe: bool = True,
         **kwargs,
     ) -> str:
         """Make a structured call to OpenRouter."""
+        model_id = model_id or config["models"]["performance_low"]
+        temperature = temperature or config["temperature"]["low"]
+        max_tokens = max_tokens or config["llm"]["max_tokens_output"]
+        system_message = system_message or config["llm"]["system_message"]
+        key = self._request_key(
+            model_id=model_id,
+            prompt=prompt,
+            system_message=system_message,
+            json_schema=json_schema,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+        cached = self._get_cached(key, use_cache)
+        if cached is not None:
+            record_usage(ledger, step, model_id, cache_hit=True)
+            return cached
 
         @self._retry
         def _call():
-            completion = self.client.chat.completions.create(
-                model=model_id or config["models"]["performance_low"],
-                temperature=temperature or config["temperature"]["low"],
-                max_tokens=max_tokens or config["llm"]["max_tokens_output"],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "output",
-                        "strict": True,
-                        "schema": json_schema,
-                    },
-                },
-                messages=[
-                    {
-                        "role": "developer",
-                        "content": system_message or config["llm"]["system_message"],
+            start = time.perf_counter()
+            with self.controller.slot(model_id):
+                completion = self.client.chat.completions.create(
+                    model=model_id,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "output",
+                            "strict": True,
+                            "schema": json_schema,
+                        },
                     },
-                    {"role": "user", "content": prompt},
-                ],
-                **kwargs,
+                    messages=[
+                        {
+                            "role": "developer",
+                            "content": system_message,
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    # Ask OpenRouter to report token usage including cost.
+                    extra_body={"usage": {"include": True}},
+                    **kwargs,
+                )
+            record_usage(
+                ledger,
+                step,
+                model_id,
+                completion.usage,
+                latency=time.perf_counter() - start,
             )
             return completion.choices[0].message.content
 
-        return _call()
+        def _fetch():
+            result = _call()
+            self._set_cached(key, result, use_cache)
+            return result
+
+        if not dedupe:
+            return _fetch()
+        return self.singleflight.do(key, _fetch)
 
     def call_with_reasoning(
         self,
@@ -138,6 +408,270 @@ class OpenRouterClient(LLMClient):
         max_tokens: int = None,
     ) -> tuple[str, dict]:
         """Call LLM API with reasoning parameters."""
+        payload = self._reasoning_payload(prompt, model_id, temperature, max_tokens)
+
+        # Since the final call is costly, we do not retry it, if it fails.
+        # If you want to retry it, uncomment the decorator below.
+        # @self._retry
+        def _call_model():
+            try:
+                with self.controller.slot(payload["model"]):
+                    response = self.session.post(
+                        f"{OPENROUTER_BASE_URL}/chat/completions",
+                        json=payload,
+                        headers=self._headers(),
+                        timeout=self._reasoning_timeout,
+                    )
+                    response.raise_for_status()
+                return self._parse_reasoning_response(response.json(), payload["model"])
+            except Exception as e:
+                custom_logger.info_console(f"Error during final reasoning: {e}")
+                return "", {"model": payload["model"]}
+
+        response, usage = _call_model()
+        return response, usage
+
+    def stream_with_reasoning(
+        self,
+        prompt: str,
+        model_id: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+        on_complete: Optional[Callable[[ReasoningStream], None]] = None,
+    ) -> ReasoningStream:
+        """
+        Call LLM API with reasoning parameters and stream the response via SSE.
+
+        on_complete is called with the stream once it is exhausted.
+        """
+        payload = self._reasoning_payload(prompt, model_id, temperature, max_tokens)
+        payload["stream"] = True
+
+        def _events():
+            with self.controller.slot(payload["model"]):
+                with self.session.post(
+                    f"{OPENROUTER_BASE_URL}/chat/completions",
+                    json=payload,
+                    headers=self._headers(),
+                    timeout=self._reasoning_timeout,
+                    stream=True,
+                ) as response:
+                    response.raise_for_status()
+                    yield from self._iter_sse_events(response)
+
+        def _complete(stream: ReasoningStream):
+            # Save the collected response once the stream is exhausted.
+            self._save_raw_response(
+                {
+                    "model": payload["model"],
+                    "content": stream.text,
+                    "usage": stream.usage,
+                }
+            )
+            if on_complete is not None:
+                on_complete(stream)
+
+        return ReasoningStream(_events(), model=payload["model"], on_complete=_complete)
+
+    @staticmethod
+    def _iter_sse_events(response: requests.Response) -> Iterator[dict]:
+        """Parse server-sent events of an OpenRouter streaming response."""
+        # SSE is UTF-8, but without a charset requests would decode it as ISO-8859-1.
+        response.encoding = "utf-8"
+        for line in response.iter_lines(decode_unicode=True):
+            # Empty lines separate events, lines starting with ":" are keep-alive comments.
+            if not line or line.startswith(":") or not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            if "error" in event:
+                raise RuntimeError(event["error"].get("message", event["error"]))
+            yield event
+
+    async def acall(
+        self,
+        prompt: str,
+        model_id: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+        reasoning_effort: Optional[str] = None,
+        use_cache: bool = True,
+        ledger: Optional[UsageLedger] = None,
+        step: Optional[str] = None,
+        dedupe: bool = True,
+        **kwargs,
+    ) -> str:
+        """Make a standard async call to OpenRouter."""
+        model_id = model_id or config["models"]["performance_low"]
+        temperature = temperature or config["temperature"]["low"]
+        max_tokens = max_tokens or config["llm"]["max_tokens_output"]
+        key = self._request_key(
+            model_id=model_id,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            reasoning_effort=reasoning_effort,
+            **kwargs,
+        )
+        cached = await self._aget_cached(key, use_cache)
+        if cached is not None:
+            record_usage(ledger, step, model_id, cache_hit=True)
+            return cached
+
+        @self._retry
+        async def _call():
+            start = time.perf_counter()
+            async with self.controller.aslot(model_id):
+                completion = await self.aclient.chat.completions.create(
+                    model=model_id,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    reasoning_effort=reasoning_effort,
+                    messages=[{"role": "user", "content": prompt}],
+                    # Ask OpenRouter to report token usage including cost.
+                    extra_body={"usage": {"include": True}},
+                    **kwargs,
+                )
+            record_usage(
+                ledger,
+                step,
+                model_id,
+                completion.usage,
+                latency=time.perf_counter() - start,
+            )
+            return completion.choices[0].message.content.strip()
+
+        async def _fetch():
+            result = await _call()
+            await self._aset_cached(key, result, use_cache)
+            return result
+
+        if not dedupe:
+            return await _fetch()
+        return await self.singleflight.ado(key, _fetch)
+
+    async def acall_structured(
+        self,
+        prompt: str,
+        json_schema: Dict[str, Any],
+        model_id: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+        system_message: str = None,
+        use_cache: bool = True,
+        ledger: Optional[UsageLedger] = None,
+        step: Optional[str] = None,
+        dedupe: bool = True,
+        **kwargs,
+    ) -> str:
+        """Make a structured async call to OpenRouter."""
+        model_id = model_id or config["models"]["performance_low"]
+        temperature = temperature or config["temperature"]["low"]
+        max_tokens = max_tokens or config["llm"]["max_tokens_output"]
+        system_message = system_message or config["llm"]["system_message"]
+        key = self._request_key(
+            model_id=model_id,
+            prompt=prompt,
+            system_message=system_message,
+            json_schema=json_schema,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+        cached = await self._aget_cached(key, use_cache)
+        if cached is not None:
+            record_usage(ledger, step, model_id, cache_hit=True)
+            return cached
+
+        @self._retry
+        async def _call():
+            start = time.perf_counter()
+            async with self.controller.aslot(model_id):
+                completion = await self.aclient.chat.completions.create(
+                    model=model_id,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "output",
+                            "strict": True,
+                            "schema": json_schema,
+                        },
+                    },
+                    messages=[
+                        {
+                            "role": "developer",
+                            "content": system_message,
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    # Ask OpenRouter to report token usage including cost.
+                    extra_body={"usage": {"include": True}},
+                    **kwargs,
+                )
+            record_usage(
+                ledger,
+                step,
+                model_id,
+                completion.usage,
+                latency=time.perf_counter() - start,
+            )
+            return completion.choices[0].message.content
+
+        async def _fetch():
+            result = await _call()
+            await self._aset_cached(key, result, use_cache)
+            return result
+
+        if not dedupe:
+            return await _fetch()
+        return await self.singleflight.ado(key, _fetch)
+
+    async def acall_with_reasoning(
+        self,
+        prompt: str,
+        model_id: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> tuple[str, dict]:
+        """Call LLM API asynchronously with reasoning parameters."""
+        payload = self._reasoning_payload(prompt, model_id, temperature, max_tokens)
+        # The pooled client is used by the aclient property; make sure it exists.
+        _ = self.aclient
+
+        try:
+            async with self.controller.aslot(payload["model"]):
+                response = await self._http_client.post(
+                    f"{OPENROUTER_BASE_URL}/chat/completions",
+                    json=payload,
+                    headers=self._headers(),
+                    timeout=httpx.Timeout(
+                        self._reasoning_timeout[1], connect=self._reasoning_timeout[0]
+                    ),
+                )
+                response.raise_for_status()
+            return self._parse_reasoning_response(response.json(), payload["model"])
+        except Exception as e:
+            custom_logger.info_console(f"Error during final reasoning: {e}")
+            return "", {"model": payload["model"]}
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _reasoning_payload(
+        self,
+        prompt: str,
+        model_id: str = None,
+        temperature: float = None,
+        max_tokens: int = None,
+    ) -> dict:
+        """Build the request payload for a reasoning call, applying the fallback model."""
 
         # At the moment, only the Gemini 2.5 model support context lengths beyond 200k.
         # Here we check if the model is not Gemini 2.5 and if the token count exceeds the fallback limit.
@@ -154,46 +688,36 @@ class OpenRouterClient(LLMClient):
             f"Calling API with prompt: {prompt[:200]}... (model: {model_id or config['models']['performance_high']})"
         )
 
-        # Since the final call is costly, we do not retry it, if it fails.
-        # If you want to retry it, uncomment the decorator below.
-        # @self._retry
-        def _call_model():
-            try:
-                url = "https://openrouter.ai/api/v1/chat/completions"
-                payload = {
-                    "model": model_id or config["models"]["performance_high"],
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature or config["temperature"]["low"],
-                    "max_tokens": max_tokens or config["llm"]["max_tokens_output"],
-                    # Adjust this according to the model specifications. Details:
-                    # https://openrouter.ai/docs/use-cases/reasoning-tokens
-                    "reasoning": {
-                        "max_tokens": -1,
-                        # "effort": "high",
-                    },
-                }
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                }
-                response = requests.post(url, json=payload, headers=headers)
-
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                with open(
-                    f"{config['app']['save_final_docs_to']}response_{timestamp}.json",
-                    "w",
-                ) as f:
-                    json.dump(response.json(), f)
-
-                response = response.json()
-                usage = response.get("usage", {})
-                response = response["choices"][0]["message"]["content"]
-                return response, usage
-            except Exception as e:
-                custom_logger.info_console(f"Error during final reasoning: {e}")
-                return "", {}
+        return {
+            "model": model_id or config["models"]["performance_high"],
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature or config["temperature"]["low"],
+            "max_tokens": max_tokens or config["llm"]["max_tokens_output"],
+            # Adjust this according to the model specifications. Details:
+            # https://openrouter.ai/docs/use-cases/reasoning-tokens
+            "reasoning": {
+                "max_tokens": -1,
+                # "effort": "high",
+            },
+            "usage": {"include": True},
+        }
 
-        response, usage = _call_model()
+    def _save_raw_response(self, data: dict) -> None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        artifact_writer.submit(resolve_save_dir() / f"response_{timestamp}.json", data)
+
+    def _parse_reasoning_response(self, data: dict, model: str) -> tuple[str, dict]:
+        """
+        Save the raw response and extract content and usage.
+
+        usage["model"] is the model that answered, which differs from the
+        requested one if the fallback model was used.
+        """
+        self._save_raw_response(data)
+
+        usage = dict(data.get("usage") or {})
+        usage["model"] = data.get("model") or model
+        response = data["choices"][0]["message"]["content"]
         return response, usage
 
 
@@ -201,14 +725,41 @@ class ClientManager:
     """Manages LLM client instances."""
 
     _instances: Dict[str, LLMClient] = {}
+    _controller: Optional[ConcurrencyController] = None
+    _singleflight: Optional[SingleFlight] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_controller(cls) -> ConcurrencyController:
+        """Get the concurrency controller shared by all clients."""
+        if cls._controller is None:
+            cls._controller = ConcurrencyController.from_config()
+        return cls._controller
+
+    @classmethod
+    def get_singleflight(cls) -> SingleFlight:
+        """Get the request deduplication layer shared by all clients."""
+        if cls._singleflight is None:
+            cls._singleflight = SingleFlight()
+        return cls._singleflight
 
     @classmethod
     def get_client(cls, provider: str = "openrouter") -> LLMClient:
         """Get or create a client instance."""
-        if provider not in cls._instances:
-            if provider == "openrouter":
-                cls._instances[provider] = OpenRouterClient()
-            else:
-                raise ValueError(f"Unknown provider: {provider}")
+        with cls._lock:
+            if provider not in cls._instances:
+                if provider != "openrouter":
+                    raise ValueError(f"Unknown provider: {provider}")
+                config.validate_env()
+                with startup_timer.timed("llm client"):
+                    cls._instances[provider] = OpenRouterClient(
+                        controller=cls.get_controller(),
+                        singleflight=cls.get_singleflight(),
+                    )
 
         return cls._instances[provider]
+
+
+def get_llm_client(provider: str = "openrouter") -> LLMClient:
+    """Return the shared LLM client, creating it on first use."""
+    return ClientManager.get_client(provider=provider)
@@ -1,33 +1,47 @@
 import pandas as pd
 import json
 import re
+import time
 from datetime import datetime
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Optional
 from _core.config import config
-from _core.models import ReflectTask, RelevanceCheck
+from _core.models import (
+    DateRangeExtraction,
+    ReflectTask,
+    RelevanceCheck,
+    RelevanceCheckBatch,
+    SearchFilters,
+)
 from _core.logger import custom_logger
-from _core.llm_client import ClientManager
+from _core.llm_client import ReasoningStream, get_llm_client
+from _core.artifacts import artifact_writer, resolve_save_dir
+from _core.usage import UsageLedger, record_usage
+from _core.hedging import hedger
 from _core.prompts import (
     CREATE_QUERIES,
     CREATE_QUERIES_ADDITIONAL,
+    EXTRACT_DATE_RANGE,
     ANALYZE_DOCUMENT,
     DOCUMENT,
     REFLECT_TASK,
     RESEARCH_WRITER,
     FORMAT_RESULT,
     CHECK_RELEVANCE,
+    CHECK_RELEVANCE_BATCH,
+    FORMAT_RESULT_BATCH,
+    FORMAT_CHUNK,
 )
 from _core.models import SearchQueries
-from _core.utils import call_function_in_parallel
-from pathlib import Path
-
-llm_client = ClientManager().get_client(provider="openrouter")
+from _core.utils import TokenCounter, acall_function_in_parallel, run_async
 
 
 def _prepare_json_schema(model_class) -> dict:
     """Prepare JSON schema with additionalProperties disabled."""
     schema = model_class.model_json_schema()
     schema["additionalProperties"] = False
+    # Strict mode also requires this for nested models.
+    for definition in schema.get("$defs", {}).values():
+        definition["additionalProperties"] = False
     return schema
 
 
@@ -82,6 +96,7 @@ def create_queries(
     previous_queries: list[str] = [],
     previous_considerations: list[str] = [],
     first_iteration: bool = True,
+    ledger: Optional[UsageLedger] = None,
 ) -> List[str]:
     """Generate search queries from a prompt and optional context."""
     json_schema = _prepare_json_schema(SearchQueries)
@@ -93,12 +108,16 @@ def create_queries(
             considerations="\n".join(previous_considerations),
         )
 
-    response = llm_client.call_structured(
+    response = get_llm_client().call_structured(
         prompt,
         json_schema,
         model_id=model_id,
         temperature=config["temperature"]["high"],
         system_message=system_message,
+        # Query creation is meant to vary between runs, so never serve it from cache.
+        use_cache=False,
+        ledger=ledger,
+        step="create_queries",
     )
 
     if not response:
@@ -108,11 +127,52 @@ def create_queries(
     return parsed.get("queries", []) if parsed else []
 
 
+def _to_iso_date(value: Optional[str]) -> Optional[str]:
+    """Return value if it is a valid YYYY-MM-DD date, else None."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return None
+
+
+def extract_search_filters(
+    user_query: str,
+    model_id: str = config["models"]["performance_low"],
+    ledger: Optional[UsageLedger] = None,
+) -> Optional[SearchFilters]:
+    """Extract a date range from the question to filter the search, or None."""
+    response = get_llm_client().call_structured(
+        user_query,
+        _prepare_json_schema(DateRangeExtraction),
+        model_id=model_id,
+        temperature=config["temperature"]["low"],
+        system_message=EXTRACT_DATE_RANGE.format(
+            today=datetime.now().strftime("%Y-%m-%d")
+        ),
+        ledger=ledger,
+        step="extract_filters",
+    )
+    parsed = _parse_json_response(response) if response else None
+    if not parsed:
+        return None
+
+    date_from = _to_iso_date(parsed.get("date_from"))
+    date_to = _to_iso_date(parsed.get("date_to"))
+    if date_from and date_to and date_from > date_to:
+        date_from, date_to = date_to, date_from
+    if not date_from and not date_to:
+        return None
+    return SearchFilters(date_from=date_from, date_to=date_to)
+
+
 def analyze_documents(
     user_query: str,
     document_ids: List[int],
     data: pd.DataFrame,
     model_id: str = config["models"]["performance_low"],
+    ledger: Optional[UsageLedger] = None,
 ) -> List[str]:
     """Analyze documents based on a user query using a language model."""
     relevant_docs = data[data["identifier"].isin(document_ids)]
@@ -128,12 +188,16 @@ def analyze_documents(
         for _, row in relevant_docs.iterrows()
     ]
 
-    results = call_function_in_parallel(
-        prompts,
-        llm_client.call,
-        max_workers=config["parallelization"]["max_workers"],
-        model_id=model_id,
-        temperature=config["temperature"]["low"],
+    results = run_async(
+        acall_function_in_parallel(
+            prompts,
+            get_llm_client().acall,
+            hedger=hedger,
+            model_id=model_id,
+            temperature=config["temperature"]["low"],
+            ledger=ledger,
+            step="analyze_documents",
+        )
     )
 
     return results or []
@@ -161,32 +225,145 @@ def _parse_relevance_results(
     return checks
 
 
-def check_relevance(
+def _check_relevance_single(
     user_query: str,
-    data: pd.DataFrame,
-    model_id: str = config["models"]["performance_low"],
-) -> pd.DataFrame:
-    """Check document relevance for a given prompt."""
+    chunk_texts: List[str],
+    model_id: str,
+    ledger: Optional[UsageLedger] = None,
+) -> List[tuple[bool | None, str | None]]:
+    """Check relevance with one LLM call per chunk."""
     prompts = [
         FORMAT_RESULT.format(
             user_query=user_query,
-            chunk_text=row["chunk_text"],
+            chunk_text=chunk_text,
         )
-        for _, row in data.iterrows()
+        for chunk_text in chunk_texts
     ]
 
     json_schema = _prepare_json_schema(RelevanceCheck)
-    results = call_function_in_parallel(
-        prompts,
-        llm_client.call_structured,
-        json_schema=json_schema,
-        max_workers=config["parallelization"]["max_workers"],
-        model_id=model_id,
-        temperature=config["temperature"]["low"],
-        system_message=CHECK_RELEVANCE,
+    results = run_async(
+        acall_function_in_parallel(
+            prompts,
+            get_llm_client().acall_structured,
+            hedger=hedger,
+            json_schema=json_schema,
+            model_id=model_id,
+            temperature=config["temperature"]["low"],
+            system_message=CHECK_RELEVANCE,
+            ledger=ledger,
+            step="check_relevance",
+        )
     )
 
-    checks = _parse_relevance_results(results or [])
+    return _parse_relevance_results(results or [])
+
+
+def _batch_by_token_budget(
+    texts: List[str], token_budget: int, max_items: int
+) -> List[List[int]]:
+    """Group text indices into batches that stay within a token budget."""
+    batches = []
+    current, current_tokens = [], 0
+    for i, text in enumerate(texts):
+        tokens = TokenCounter.count_tokens(text)
+        if current and (
+            current_tokens + tokens > token_budget or len(current) >= max_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _check_relevance_batched(
+    user_query: str,
+    chunk_texts: List[str],
+    model_id: str,
+    ledger: Optional[UsageLedger] = None,
+) -> List[tuple[bool | None, str | None]]:
+    """
+    Check relevance of several chunks per LLM call.
+
+    Chunks whose verdict is missing or unparseable are re-checked one by one.
+    """
+    batches = _batch_by_token_budget(
+        chunk_texts,
+        token_budget=config["relevance"]["batch_token_budget"],
+        max_items=config["relevance"]["batch_max_chunks"],
+    )
+    prompts = [
+        FORMAT_RESULT_BATCH.format(
+            user_query=user_query,
+            chunks="\n\n".join(
+                FORMAT_CHUNK.format(chunk_id=chunk_id, chunk_text=chunk_texts[i])
+                for chunk_id, i in enumerate(batch, 1)
+            ),
+        )
+        for batch in batches
+    ]
+
+    json_schema = _prepare_json_schema(RelevanceCheckBatch)
+    results = run_async(
+        acall_function_in_parallel(
+            prompts,
+            get_llm_client().acall_structured,
+            hedger=hedger,
+            json_schema=json_schema,
+            model_id=model_id,
+            temperature=config["temperature"]["low"],
+            system_message=CHECK_RELEVANCE_BATCH,
+            ledger=ledger,
+            step="check_relevance",
+        )
+    )
+
+    checks: List[tuple[bool | None, str | None] | None] = [None] * len(chunk_texts)
+    for batch, result in zip(batches, results or []):
+        parsed = _parse_json_response(result) if result else None
+        if not parsed:
+            continue
+        for item in parsed.get("checks", []):
+            chunk_id = item.get("chunk_id")
+            if not isinstance(chunk_id, int) or not 1 <= chunk_id <= len(batch):
+                continue
+            relevance = _to_bool(item.get("relevance"))
+            if relevance is not None:
+                checks[batch[chunk_id - 1]] = (relevance, item.get("reasoning"))
+
+    missing = [i for i, check in enumerate(checks) if check is None]
+    if missing:
+        custom_logger.info_console(
+            f"Batched relevance check incomplete for {len(missing)} chunks. Checking them individually."
+        )
+        fallback = _check_relevance_single(
+            user_query, [chunk_texts[i] for i in missing], model_id, ledger=ledger
+        )
+        for i, check in zip(missing, fallback):
+            checks[i] = check
+
+    return checks
+
+
+def check_relevance(
+    user_query: str,
+    data: pd.DataFrame,
+    model_id: str = config["models"]["performance_low"],
+    ledger: Optional[UsageLedger] = None,
+) -> pd.DataFrame:
+    """Check document relevance for a given prompt."""
+    chunk_texts = data["chunk_text"].tolist()
+
+    if config["relevance"]["batch_enabled"] and len(chunk_texts) > 1:
+        checks = _check_relevance_batched(
+            user_query, chunk_texts, model_id, ledger=ledger
+        )
+    else:
+        checks = _check_relevance_single(
+            user_query, chunk_texts, model_id, ledger=ledger
+        )
 
     data["relevance"] = [x[0] for x in checks]
     data["reasoning"] = [x[1] for x in checks]
@@ -198,6 +375,7 @@ def reflect_task_status(
     user_query: str,
     research_results: str,
     model_id: str = config["models"]["performance_low"],
+    ledger: Optional[UsageLedger] = None,
 ) -> tuple[bool | None, str | None]:
     """Evaluate if the research task is finished based on the query and results."""
     prompt = REFLECT_TASK.format(
@@ -206,11 +384,13 @@ def reflect_task_status(
     )
 
     json_schema = _prepare_json_schema(ReflectTask)
-    response = llm_client.call_structured(
+    response = get_llm_client().call_structured(
         prompt=prompt,
         model_id=model_id,
         temperature=config["temperature"]["low"],
         json_schema=json_schema,
+        ledger=ledger,
+        step="reflect_task",
     )
 
     if not response:
@@ -223,12 +403,8 @@ def reflect_task_status(
     return None, None
 
 
-def create_final_report(
-    user_query: str,
-    final_docs: pd.DataFrame,
-    model_id: str = config["models"]["performance_high"],
-) -> tuple[str, dict]:
-    """Generate a final research report from selected documents."""
+def _prepare_final_report_prompt(user_query: str, final_docs: pd.DataFrame) -> str:
+    """Build the final report prompt and save the underlying documents."""
     research_results = [
         DOCUMENT.format(
             title=row["title"],
@@ -246,25 +422,66 @@ def create_final_report(
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Pfad aus der Config robust auflösen:
-    cfg_path = Path(config["app"]["save_final_docs_to"])
-    app_base = Path(__file__).resolve().parents[2]  # .../deep-research-urteile/
-    save_dir = cfg_path if cfg_path.is_absolute() else (app_base / cfg_path)
-    save_dir.mkdir(parents=True, exist_ok=True)
-
-    out_file = (save_dir / f"final_docs_{timestamp}.json").resolve()
+    out_file = artifact_writer.submit(
+        resolve_save_dir() / f"final_docs_{timestamp}.json",
+        research_results,
+        indent=2,
+        ensure_ascii=False,
+    )
     print(f"[DEBUG] Writing final docs to: {out_file}")
 
-    with out_file.open("w", encoding="utf-8") as f:
-        json.dump(research_results, f, indent=2, ensure_ascii=False)
-
     research_results_text = "\n\n".join(research_results)
 
-    response, usage = llm_client.call_with_reasoning(
-        prompt=RESEARCH_WRITER.format(
-            user_query=user_query, research_results=research_results_text
-        ),
+    return RESEARCH_WRITER.format(
+        user_query=user_query, research_results=research_results_text
+    )
+
+
+def create_final_report(
+    user_query: str,
+    final_docs: pd.DataFrame,
+    model_id: str = config["models"]["performance_high"],
+    ledger: Optional[UsageLedger] = None,
+) -> tuple[str, dict]:
+    """Generate a final research report from selected documents."""
+    prompt = _prepare_final_report_prompt(user_query, final_docs)
+    start = time.perf_counter()
+    response, usage = get_llm_client().call_with_reasoning(
+        prompt=prompt,
         model_id=model_id,
         temperature=config["temperature"]["base"],
     )
+    # The fallback model may have answered instead of model_id.
+    record_usage(
+        ledger,
+        "final_report",
+        usage.get("model", model_id),
+        usage,
+        latency=time.perf_counter() - start,
+    )
     return response, usage
+
+
+def stream_final_report(
+    user_query: str,
+    final_docs: pd.DataFrame,
+    model_id: str = config["models"]["performance_high"],
+    ledger: Optional[UsageLedger] = None,
+) -> ReasoningStream:
+    """
+    Stream a final research report from selected documents as it is generated.
+
+    Usage is recorded in the ledger once the stream is exhausted.
+    """
+    return get_llm_client().stream_with_reasoning(
+        prompt=_prepare_final_report_prompt(user_query, final_docs),
+        model_id=model_id,
+        temperature=config["temperature"]["base"],
+        on_complete=lambda stream: record_usage(
+            ledger,
+            "final_report",
+            stream.usage.get("model", model_id),
+            stream.usage,
+            latency=stream.usage.get("generation_time", 0.0),
+        ),
+    )
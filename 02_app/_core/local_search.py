@@ -0,0 +1,356 @@
+import re
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from _core.config import config
+from _core.embeddings import get_encoder
+from _core.logger import custom_logger
+from _core.models import SearchFilters
+from _core.vector_store import (
+    FlatVectorStore,
+    QuantizedVectorStore,
+    source_fingerprint,
+)
+
+# Namespace for deterministic chunk UUIDs, derived from identifier and chunk position.
+CHUNK_UUID_NAMESPACE = uuid.UUID("6f1c5a52-3b1e-4a55-9a0c-2f7f3c1d9e10")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split on non-alphanumeric characters, like Weaviate's word tokenization."""
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def autocut(scores: np.ndarray, cutoff: int) -> int:
+    """
+    Return how many results to keep, cutting after the given number of score jumps.
+
+    Port of Weaviate's autocut: scores (sorted) are normalized to [0, 1] and
+    compared against a straight line. Each local maximum of the difference counts
+    as a jump; the results are cut before the cutoff-th jump.
+    """
+    n = len(scores)
+    if n <= 1 or cutoff <= 0:
+        return n
+    span = scores[-1] - scores[0]
+    if span == 0:
+        return n
+    diff = (scores - scores[0]) / span - np.linspace(0.0, 1.0, n)
+
+    extrema = 0
+    for i in range(1, n):
+        if i == n - 1:
+            # The last point has no right neighbour.
+            is_extremum = n > 2 and diff[i] > diff[i - 1] and diff[i] > diff[i - 2]
+        else:
+            is_extremum = diff[i] > diff[i - 1] and diff[i] >= diff[i + 1]
+        if is_extremum:
+            extrema += 1
+            if extrema >= cutoff:
+                return i
+    return n
+
+
+class _BM25Field:
+    """Inverted index with BM25 scoring for one text field."""
+
+    def __init__(self, texts: List[str], k1: float, b: float):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(texts)
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for doc_idx, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc_idx] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_idx, tf))
+
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.n_docs else 0.0
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            term: (
+                np.array([d for d, _ in entries], dtype=np.int32),
+                np.array([t for _, t in entries], dtype=np.float32),
+            )
+            for term, entries in postings.items()
+        }
+
+    def score(self, terms: List[str], scores: np.ndarray) -> None:
+        """Add the BM25 scores of terms to scores in place."""
+        if not self.avg_length:
+            return
+        for term in terms:
+            if term not in self.postings:
+                continue
+            docs, tf = self.postings[term]
+            idf = np.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            length_ratio = self.lengths[docs] / self.avg_length
+            norm = self.k1 * (1 - self.b + self.b * length_ratio)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+
+class LocalHybridIndex:
+    """
+    In-process hybrid search over the chunk parquet, without a Weaviate server.
+
+    Combines a NumPy vector index with a BM25 index over `text` and `title`,
+    fused with relative score fusion and autocut, mirroring search.hybrid_search.
+    Vectors are either held in RAM as float32 or as int8/binary codes that are
+    rescored with full-precision vectors memory-mapped from disk.
+    """
+
+    def __init__(
+        self,
+        chunks: pd.DataFrame,
+        embeddings: Union[np.ndarray, FlatVectorStore, QuantizedVectorStore],
+        alpha: float,
+        k1: float,
+        b: float,
+    ):
+        self.chunks = chunks.reset_index(drop=True)
+        if isinstance(embeddings, np.ndarray):
+            embeddings = FlatVectorStore(embeddings)
+        self.vector_store = embeddings
+        self.alpha = alpha
+
+        chunk_index = self.chunks.groupby("identifier").cumcount()
+        self.uuids = [
+            str(uuid.uuid5(CHUNK_UUID_NAMESPACE, f"{identifier}:{i}"))
+            for identifier, i in zip(self.chunks["identifier"], chunk_index)
+        ]
+        self._fields = [
+            _BM25Field(self.chunks["chunk_text"].fillna("").tolist(), k1, b),
+            _BM25Field(self.chunks["title"].fillna("").tolist(), k1, b),
+        ]
+        # Metadata for filters; older parquet files may not have these columns.
+        self._dates = (
+            pd.to_datetime(self.chunks["date"]).to_numpy()
+            if "date" in self.chunks
+            else None
+        )
+        self._token_counts = (
+            self.chunks["token_count"].to_numpy()
+            if "token_count" in self.chunks
+            else None
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        chunks_file: str,
+        embeddings_file: Optional[str] = None,
+        alpha: float = 0.75,
+        k1: float = 1.2,
+        b: float = 0.75,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        vector_store_dir: Optional[str] = None,
+    ) -> "LocalHybridIndex":
+        """
+        Load the index from the parquet files of 01_data/01_index_data.ipynb.
+
+        The embeddings parquet (04_KRP_embed.parq) holds chunks plus their vectors.
+        If it is missing, the chunks (03_KRP_chunks.parq) are embedded on load.
+
+        With quantization "int8" or "binary", the vectors are converted once into
+        vector_store_dir and reused while the embeddings parquet is unchanged.
+        """
+        if embeddings_file and Path(embeddings_file).exists():
+            if quantization != "none" and vector_store_dir:
+                store_dir = Path(vector_store_dir)
+                source = source_fingerprint(Path(embeddings_file))
+                store = QuantizedVectorStore.load(
+                    store_dir, quantization, source, rescore_factor=rescore_factor
+                )
+                if store is None:
+                    chunks = pd.read_parquet(embeddings_file)
+                    embeddings = np.vstack(chunks.pop("embeddings").to_numpy())
+                    custom_logger.info_console(
+                        f"Building {quantization} vector store in {store_dir}..."
+                    )
+                    store = QuantizedVectorStore.build(
+                        embeddings, quantization, rescore_factor=rescore_factor
+                    )
+                    store.save(store_dir, source)
+                    del embeddings
+                    # Reopen so the full vectors are memory-mapped, not held in RAM.
+                    store = (
+                        QuantizedVectorStore.load(
+                            store_dir, quantization, source, rescore_factor
+                        )
+                        or store
+                    )
+                else:
+                    columns = [
+                        name
+                        for name in pq.read_schema(embeddings_file).names
+                        if name != "embeddings"
+                    ]
+                    chunks = pd.read_parquet(embeddings_file, columns=columns)
+                return cls(chunks, store, alpha=alpha, k1=k1, b=b)
+
+            chunks = pd.read_parquet(embeddings_file)
+            embeddings = np.vstack(chunks.pop("embeddings").to_numpy())
+        else:
+            custom_logger.info_console(
+                f"No embeddings file found. Embedding chunks from {chunks_file}..."
+            )
+            chunks = pd.read_parquet(chunks_file)
+            chunks = chunks[chunks["chunk_text"].notna()]
+            embeddings = get_encoder().embed(chunks["chunk_text"].tolist())
+        return cls(chunks, embeddings, alpha=alpha, k1=k1, b=b)
+
+    @classmethod
+    def from_config(cls) -> "LocalHybridIndex":
+        local_config = config["local_search"]
+        base = Path(__file__).resolve().parents[2]  # .../deep-research/
+        return cls.from_parquet(
+            chunks_file=str(base / local_config["chunks_file"]),
+            embeddings_file=str(base / local_config["embeddings_file"]),
+            alpha=config["search"]["alpha"],
+            k1=local_config["bm25_k1"],
+            b=local_config["bm25_b"],
+            quantization=local_config["quantization"],
+            rescore_factor=local_config["rescore_factor"],
+            vector_store_dir=str(base / local_config["vector_store_dir"]),
+        )
+
+    def _bm25_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        terms = tokenize(query)
+        for field in self._fields:
+            field.score(terms, scores)
+        return scores
+
+    def _vector_scores(
+        self, vector: np.ndarray, limit: int, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Cosine similarities; -inf for chunks a quantized store did not rescore."""
+        return self.vector_store.scores(vector, limit, mask=mask)
+
+    def _filter_mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Boolean mask of chunks matching filters, or None to keep all chunks."""
+        if filters is None:
+            return None
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if self._dates is not None:
+            if filters.date_from:
+                mask &= self._dates >= np.datetime64(filters.date_from)
+            if filters.date_to:
+                # date_to is inclusive, so compare against the start of the next day.
+                next_day = np.datetime64(filters.date_to) + np.timedelta64(1, "D")
+                mask &= self._dates < next_day
+        if self._token_counts is not None:
+            if filters.min_token_count is not None:
+                mask &= self._token_counts >= filters.min_token_count
+            if filters.max_token_count is not None:
+                mask &= self._token_counts <= filters.max_token_count
+        return mask
+
+    @staticmethod
+    def _top(
+        scores: np.ndarray,
+        limit: int,
+        positive_only: bool = False,
+        mask: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Indices of the highest scores (within mask), sorted descending."""
+        keep = np.isfinite(scores)
+        if mask is not None:
+            keep &= mask
+        if positive_only:
+            keep = keep & (scores > 0)
+        candidates = np.flatnonzero(keep)
+        if len(candidates) > limit:
+            partition = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[partition]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def _results(
+        self, indices: np.ndarray, scores: np.ndarray, auto_limit: int
+    ) -> List[Tuple[str, str, str, float]]:
+        keep = autocut(scores, auto_limit) if auto_limit else len(indices)
+        return [
+            (
+                self.chunks.at[i, "identifier"],
+                self.chunks.at[i, "chunk_text"],
+                self.uuids[i],
+                float(score),
+            )
+            for i, score in zip(indices[:keep], scores[:keep])
+        ]
+
+    def bm25(
+        self,
+        query: str,
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ):
+        """Keyword search. Returns (identifier, text, uuid, score) tuples."""
+        scores = self._bm25_scores(query)
+        top = self._top(
+            scores, limit, positive_only=True, mask=self._filter_mask(filters)
+        )
+        return self._results(top, scores[top], auto_limit)
+
+    def vector(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ):
+        """Vector search by cosine similarity. Returns (identifier, text, uuid, score)."""
+        mask = self._filter_mask(filters)
+        scores = self._vector_scores(vector, limit, mask=mask)
+        top = self._top(scores, limit, mask=mask)
+        return self._results(top, scores[top], auto_limit)
+
+    def hybrid(
+        self,
+        query: str,
+        limit: int,
+        auto_limit: int,
+        vector: np.ndarray = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Tuple[str, str, str, float]]:
+        """
+        Hybrid search with relative score fusion, same contract as search.hybrid_search.
+
+        Returns:
+            list[tuple[str, str, str, float]]: Tuples of (identifier, text, uuid, score).
+        """
+        if vector is None:
+            vector = get_encoder().embed([query])[0]
+
+        mask = self._filter_mask(filters)
+        fused = np.zeros(len(self.chunks), dtype=np.float32)
+        # Hits of either search are kept, even the weakest one, which normalizes to 0.
+        candidates = np.zeros(len(self.chunks), dtype=bool)
+        for weight, scores, positive_only in (
+            (self.alpha, self._vector_scores(vector, limit, mask=mask), False),
+            (1 - self.alpha, self._bm25_scores(query), True),
+        ):
+            top = self._top(scores, limit, positive_only=positive_only, mask=mask)
+            if len(top) == 0:
+                continue
+            # Relative score fusion: min-max normalize each result set before weighting.
+            top_scores = scores[top]
+            span = top_scores.max() - top_scores.min()
+            if span:
+                normalized = (top_scores - top_scores.min()) / span
+            else:
+                normalized = np.ones_like(top_scores)
+            fused[top] += weight * normalized
+            candidates[top] = True
+
+        top = self._top(fused, limit, mask=candidates)
+        return self._results(top, fused[top], auto_limit)
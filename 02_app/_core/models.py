@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class SearchQueries(BaseModel):
@@ -11,6 +11,31 @@ class RelevanceCheck(BaseModel):
     relevance: bool | None
 
 
+class ChunkRelevanceCheck(BaseModel):
+    chunk_id: int
+    reasoning: str
+    relevance: bool | None
+
+
+class RelevanceCheckBatch(BaseModel):
+    checks: List[ChunkRelevanceCheck]
+
+
 class ReflectTask(BaseModel):
     reflection: str
     finished: bool | None
+
+
+class SearchFilters(BaseModel):
+    """Metadata constraints pushed down into the search index."""
+
+    date_from: Optional[str] = None  # YYYY-MM-DD, inclusive
+    date_to: Optional[str] = None  # YYYY-MM-DD, inclusive
+    min_token_count: Optional[int] = None
+    max_token_count: Optional[int] = None
+
+
+class DateRangeExtraction(BaseModel):
+    reasoning: str
+    date_from: str | None
+    date_to: str | None
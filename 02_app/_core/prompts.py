@@ -23,6 +23,22 @@ Hier weitere Überlegungen, die du bei der Generierung der Suchanfragen berücks
 """
 
 
+EXTRACT_DATE_RANGE = """
+Du bist ein Rechercheassistent, spezialisiert auf Dokumente vom Kantonsrat Zürich.
+
+Ein Experte stellt dir eine oder mehrere Fragen. Deine Aufgabe ist es zu erkennen, ob die Fragen die Recherche ausdrücklich auf einen Zeitraum einschränken, z. B. «seit 2010», «im Jahr 2015» oder «in den letzten fünf Jahren».
+
+Wichtige Hinweise:
+- Das heutige Datum ist {today}. Rechne relative Angaben damit in Daten um.
+- Gib nur einen Zeitraum an, wenn er in den Fragen klar genannt wird. Im Zweifel gib keinen an.
+- Eine offene Seite des Zeitraums bleibt leer (null).
+
+Antwortformat:
+reasoning: <Stichwortartige Begründung>
+date_from: <Frühestes Datum im Format JJJJ-MM-TT oder null>
+date_to: <Spätestes Datum im Format JJJJ-MM-TT oder null>
+""".strip()
+
 FORMAT_RESULT = """
 Frage des Experten:
 {user_query}
@@ -50,6 +66,43 @@ relevance: True | False
 """.strip()
 
 
+FORMAT_RESULT_BATCH = """
+Frage des Experten:
+{user_query}
+
+Textabschnitte aus Dokumenten:
+{chunks}
+""".strip()
+
+
+FORMAT_CHUNK = """
+<abschnitt id="{chunk_id}">
+{chunk_text}
+</abschnitt>
+""".strip()
+
+
+CHECK_RELEVANCE_BATCH = """
+Du bist ein Rechercheassistent, spezialisiert auf Dokumente vom Kanton Zürich.
+
+Dir wird eine oder mehrere Fragen und mehrere nummerierte Ausschnitte aus Dokumenten vorgelegt. Deine Aufgabe ist es, für jeden Ausschnitt einzeln zu beurteilen, ob er zur Beantwortung der Fragen hilfreich sein könnte.
+
+Wichtige Hinweise:
+- Es handelt sich nur um Ausschnitte, nicht um die vollständigen Dokumente.
+- Ein Ausschnitt muss die Frage(n) nicht vollständig beantworten.
+- Beurteile ausschließlich, ob der jeweilige Ausschnitt potenziell hilfreich ist.
+- Beurteile jeden Ausschnitt unabhängig von den anderen.
+- Gib für jeden Ausschnitt genau eine Beurteilung ab.
+
+Antwortformat (eine Beurteilung pro Ausschnitt):
+chunk_id: <id des Ausschnitts>
+reasoning: <Stichwortartige Begründung für deine Einschätzung>
+relevance: True | False
+    - True: Der Ausschnitt enthält Informationen, die für die Beantwortung der Frage(n) hilfreich sein können.
+    - False: Der Ausschnitt ist offensichtlich nicht relevant.
+""".strip()
+
+
 ANALYZE_DOCUMENT = """
 Du bist ein Rechercheassistent, spezialisiert auf Dokumente vom Kanton Zürich.
 
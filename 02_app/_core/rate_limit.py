@@ -0,0 +1,297 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from tenacity.wait import wait_base
+from _core.config import config
+from _core.logger import custom_logger
+
+# Status codes that indicate the provider is overloaded or throttling us.
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def status_code_of(error: Optional[BaseException]) -> Optional[int]:
+    """Extract the HTTP status code from an openai, httpx or requests error."""
+    if error is None:
+        return None
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def retry_after_seconds(error: Optional[BaseException]) -> Optional[float]:
+    """Extract the Retry-After header of an error response in seconds, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class wait_retry_after(wait_base):
+    """Tenacity wait that honours Retry-After and otherwise defers to a fallback wait."""
+
+    def __init__(self, fallback: wait_base, max_wait: float):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        fallback_wait = self.fallback(retry_state)
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = retry_after_seconds(error)
+        if retry_after is None:
+            return fallback_wait
+        return max(min(retry_after, self.max_wait), fallback_wait)
+
+
+class RequestTimer:
+    """Records when a request got its first slot, i.e. stopped queueing."""
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self.started: Optional[float] = None
+
+    def mark_started(self) -> None:
+        # Retries acquire the slot again; the request started with the first one.
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Seconds since the request started, or since creation if it never queued."""
+        return time.perf_counter() - (self.started or self.created)
+
+
+# Set around the creation of a task to time its request without queue time.
+request_timer: ContextVar[Optional[RequestTimer]] = ContextVar(
+    "request_timer", default=None
+)
+
+
+def _mark_request_started() -> None:
+    timer = request_timer.get()
+    if timer is not None:
+        timer.mark_started()
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate. Not thread-safe on its own."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self, now: float) -> float:
+        """Take one token. Returns 0 on success, else the seconds until one is available."""
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+@dataclass
+class _Window:
+    limit: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+    throttled: int = 0
+
+
+class ConcurrencyController:
+    """
+    Adaptive concurrency control shared by all LLM clients.
+
+    A token bucket caps the overall request rate. Per model, the number of
+    requests in flight follows AIMD: it grows by increase_step per window of
+    successful calls and is multiplied by decrease_factor on 429/5xx responses.
+    A Retry-After header pauses all new requests to that model until it expires.
+    """
+
+    # How long waiters sleep before re-checking a full window.
+    _POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: float,
+        initial_concurrency: int,
+        min_concurrency: int,
+        max_concurrency: int,
+        increase_step: float,
+        decrease_factor: float,
+        max_retry_after: float,
+    ):
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.max_retry_after = max_retry_after
+        self._bucket = TokenBucket(requests_per_second, burst)
+        self._windows: Dict[str, _Window] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "ConcurrencyController":
+        rate_config = config["rate_limit"]
+        return cls(
+            requests_per_second=rate_config["requests_per_second"],
+            burst=rate_config["burst"],
+            initial_concurrency=rate_config["initial_concurrency"],
+            min_concurrency=rate_config["min_concurrency"],
+            max_concurrency=rate_config["max_concurrency"],
+            increase_step=rate_config["increase_step"],
+            decrease_factor=rate_config["decrease_factor"],
+            max_retry_after=rate_config["max_retry_after"],
+        )
+
+    def _window(self, model: str) -> _Window:
+        if model not in self._windows:
+            self._windows[model] = _Window(limit=float(self.initial_concurrency))
+        return self._windows[model]
+
+    def _try_acquire(self, model: str) -> float:
+        """Take a slot for model. Returns 0 on success, else the seconds to wait."""
+        with self._lock:
+            window = self._window(model)
+            now = time.monotonic()
+            if now < window.blocked_until:
+                return window.blocked_until - now
+            if window.in_flight >= int(window.limit):
+                return self._POLL_INTERVAL
+            wait = self._bucket.try_acquire(now)
+            if wait > 0:
+                return wait
+            window.in_flight += 1
+            return 0.0
+
+    def acquire(self, model: str) -> None:
+        """Block until a request to model may be sent."""
+        while (wait := self._try_acquire(model)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, model: str) -> None:
+        """Wait without blocking the event loop until a request to model may be sent."""
+        while (wait := self._try_acquire(model)) > 0:
+            await asyncio.sleep(wait)
+
+    def release(
+        self, model: str, error: Optional[BaseException] = None, adapt: bool = True
+    ) -> None:
+        """
+        Return the slot and adapt the window to the outcome of the request.
+
+        With adapt=False (e.g. a cancelled request) the window is left unchanged.
+        """
+        status = status_code_of(error)
+        with self._lock:
+            window = self._window(model)
+            window.in_flight = max(window.in_flight - 1, 0)
+            if not adapt:
+                return
+            now = time.monotonic()
+
+            if status in THROTTLE_STATUS_CODES:
+                window.throttled += 1
+                retry_after = retry_after_seconds(error)
+                if retry_after is not None:
+                    window.blocked_until = max(
+                        window.blocked_until,
+                        now + min(retry_after, self.max_retry_after),
+                    )
+                # Decrease at most once per burst of failures, which arrive together.
+                if now - window.last_decrease > 1.0:
+                    window.limit = max(
+                        self.min_concurrency, window.limit * self.decrease_factor
+                    )
+                    window.last_decrease = now
+                    custom_logger.info_console(
+                        f"LLM throttled ({status}) for {model}. "
+                        f"Concurrency reduced to {int(window.limit)}."
+                    )
+            elif error is None:
+                window.limit = min(
+                    self.max_concurrency,
+                    window.limit + self.increase_step / window.limit,
+                )
+
+    @contextmanager
+    def slot(self, model: str):
+        """Hold a request slot for model for the duration of the block."""
+        self.acquire(model)
+        _mark_request_started()
+        error = None
+        adapt = True
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            adapt = False
+            raise
+        finally:
+            self.release(model, error, adapt=adapt)
+
+    @asynccontextmanager
+    async def aslot(self, model: str):
+        """Async variant of slot. Cancellation releases the slot without penalty."""
+        await self.aacquire(model)
+        _mark_request_started()
+        error = None
+        adapt = True
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            # CancelledError is a BaseException. A cancelled request (e.g. a losing
+            # hedge) never completed, so it says nothing about the provider's load.
+            adapt = False
+            raise
+        finally:
+            self.release(model, error, adapt=adapt)
+
+    def is_saturated(self, model: str) -> bool:
+        """Whether a new request to model would have to wait for a slot."""
+        with self._lock:
+            window = self._window(model)
+            return (
+                time.monotonic() < window.blocked_until
+                or window.in_flight >= int(window.limit)
+            )
+
+    def stats(self) -> Dict[str, dict]:
+        """Return the current window, in-flight count and throttle count per model."""
+        with self._lock:
+            return {
+                model: {
+                    "concurrency": int(window.limit),
+                    "in_flight": window.in_flight,
+                    "throttled": window.throttled,
+                }
+                for model, window in self._windows.items()
+            }
@@ -1,51 +1,513 @@
+import json
 import pandas as pd
-from typing import List
-import weaviate
-import weaviate.classes as wvc
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple, Union
+import threading
+import numpy as np
 import atexit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from _core.logger import custom_logger
 from _core.config import config
-from _core.embeddings import st_encoder as encoder
+from _core.embeddings import get_encoder
+from _core.models import SearchFilters
+from _core.startup import startup_timer
 
+if TYPE_CHECKING:
+    import weaviate
 
-def initialize_weaviate(collection_name: str = None):
+# (identifier, text, uuid, score)
+SearchResult = Tuple[str, str, str, float]
+
+
+class SearchBackend(ABC):
     """
-    Connect to local Weaviate on Docker and return the specified collection.
+    Abstract base class for search backends.
 
-    Args:
-        collection_name (str, optional): Collection name. Uses config if None.
+    All search methods return lists of (identifier, text, uuid, score) tuples.
+    They take optional SearchFilters that the backend applies inside the index.
+    The batched variants return one entry per query, holding either the results
+    or the exception raised for that query.
+    """
 
-    Returns:
-        weaviate.collections.Collection: The collection object.
+    @abstractmethod
+    def hybrid(
+        self,
+        query: str,
+        limit: int,
+        auto_limit: int,
+        vector: np.ndarray = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchResult]:
+        """Hybrid search combining keywords and the query vector."""
+        pass
+
+    @abstractmethod
+    def bm25(
+        self,
+        query: str,
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchResult]:
+        """Keyword search."""
+        pass
+
+    @abstractmethod
+    def vector(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchResult]:
+        """Vector search."""
+        pass
+
+    # Name of the searched collection, part of the search cache key.
+    collection_name: str = ""
+
+    def health_check(self) -> bool:
+        """Return whether the backend can serve queries."""
+        return True
+
+    def warm_up(self) -> None:
+        """Open connections or load the index ahead of the first query."""
+        pass
+
+    def index_version(self) -> Optional[str]:
+        """Return a marker that changes whenever the index is rebuilt."""
+        return None
+
+    def _run_batch(self, calls) -> List[Union[List[SearchResult], Exception]]:
+        """Run search calls on a bounded thread pool, isolating per-call failures."""
+        if not calls:
+            return []
+        max_workers = min(len(calls), config["search"]["max_concurrent_searches"])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(call) for call in calls]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def hybrid_batch(
+        self,
+        queries: List[str],
+        limit: int,
+        auto_limit: int,
+        vectors: Optional[np.ndarray] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Union[List[SearchResult], Exception]]:
+        """Run hybrid search for several queries concurrently."""
+        if vectors is None:
+            vectors = [None] * len(queries)
+        return self._run_batch(
+            [
+                lambda q=query, v=vector: self.hybrid(
+                    q, limit, auto_limit, vector=v, filters=filters
+                )
+                for query, vector in zip(queries, vectors)
+            ]
+        )
+
+    def bm25_batch(
+        self,
+        queries: List[str],
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Union[List[SearchResult], Exception]]:
+        """Run keyword search for several queries concurrently."""
+        return self._run_batch(
+            [
+                lambda q=query: self.bm25(q, limit, auto_limit, filters=filters)
+                for query in queries
+            ]
+        )
+
+    def vector_batch(
+        self,
+        vectors: np.ndarray,
+        limit: int,
+        auto_limit: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Union[List[SearchResult], Exception]]:
+        """Run vector search for several vectors concurrently."""
+        return self._run_batch(
+            [
+                lambda v=vector: self.vector(v, limit, auto_limit, filters=filters)
+                for vector in vectors
+            ]
+        )
+
+
+_index_versions: Dict[str, Tuple[float, Optional[dict]]] = {}
+
+
+def read_index_version(collection_name: str) -> Optional[str]:
     """
-    if collection_name is None:
-        collection_name = config["weaviate"]["collection_name"]
+    Read the index version marker written by the indexing step.
 
+    The marker file is re-read only when it changes on disk. Returns None if
+    there is no marker for the given collection.
+    """
+    base = Path(__file__).resolve().parents[2]  # .../deep-research/
+    path = base / config["search_cache"]["index_version_file"]
     try:
-        client = weaviate.connect_to_local(
-            port=config["weaviate"]["port"], grpc_port=config["weaviate"]["grpc_port"]
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    cached = _index_versions.get(str(path))
+    if cached is None or cached[0] != mtime:
+        try:
+            marker = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            custom_logger.error(f"Could not read index version marker {path}: {e}")
+            marker = None
+        cached = (mtime, marker)
+        _index_versions[str(path)] = cached
+    marker = cached[1]
+    if not marker or marker.get("collection_name") != collection_name:
+        return None
+    return marker.get("version")
+
+
+def _to_utc_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+# Properties that search filters apply to. Collections indexed before they were
+# added lack them, and Weaviate rejects filters on unknown properties.
+FILTER_PROPERTIES = ("date", "token_count")
+
+
+def missing_filter_properties(collection_name: str, properties: Set[str]) -> Set[str]:
+    """Return the filter properties the collection lacks, logging them once."""
+    missing = set(FILTER_PROPERTIES) - properties
+    if missing:
+        custom_logger.info_console(
+            f"Collection {collection_name} has no {', '.join(sorted(missing))} "
+            "properties. Filters on them are ignored until the data is re-indexed."
         )
-    except:
-        raise
-    collection = client.collections.get(collection_name)
+    return missing
 
-    # Register cleanup function
-    def cleanup_weaviate():
+
+def build_weaviate_filter(
+    filters: Optional[SearchFilters], properties: Optional[Set[str]] = None
+):
+    """
+    Translate SearchFilters into a Weaviate filter on the date and token_count properties.
+
+    Args:
+        filters (SearchFilters, optional): Date and token count constraints.
+        properties (set[str], optional): Property names of the collection.
+            Conditions on properties not in the set are dropped.
+
+    Returns None if there is nothing to filter on.
+    """
+    if filters is None:
+        return None
+    import weaviate.classes as wvc
+
+    def _has(name: str) -> bool:
+        return properties is None or name in properties
+
+    conditions = []
+    if _has("date"):
+        if filters.date_from:
+            conditions.append(
+                wvc.query.Filter.by_property("date").greater_or_equal(
+                    _to_utc_datetime(filters.date_from)
+                )
+            )
+        if filters.date_to:
+            # date_to is inclusive, so compare against the start of the next day.
+            conditions.append(
+                wvc.query.Filter.by_property("date").less_than(
+                    _to_utc_datetime(filters.date_to) + timedelta(days=1)
+                )
+            )
+    if _has("token_count"):
+        if filters.min_token_count is not None:
+            conditions.append(
+                wvc.query.Filter.by_property("token_count").greater_or_equal(
+                    filters.min_token_count
+                )
+            )
+        if filters.max_token_count is not None:
+            conditions.append(
+                wvc.query.Filter.by_property("token_count").less_or_equal(
+                    filters.max_token_count
+                )
+            )
+    if not conditions:
+        return None
+    return wvc.query.Filter.all_of(conditions)
+
+
+class WeaviateBackend(SearchBackend):
+    """
+    Search backend for a local Weaviate instance on Docker.
+
+    The connection opens on first use. If a query fails because the connection
+    dropped, the backend reconnects once and retries.
+    """
+
+    def __init__(self, collection_name: str = None):
+        self.collection_name = collection_name or config["weaviate"]["collection_name"]
+        self._client: Optional["weaviate.WeaviateClient"] = None
+        self._lock = threading.Lock()
+        self._properties: Optional[Set[str]] = None
+
+    def _connect(self) -> None:
+        # Imported here because the client library is slow to import.
+        import weaviate
+
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception as e:
+                custom_logger.error(f"Error closing Weaviate client: {e}")
+        with startup_timer.timed("weaviate"):
+            self._client = weaviate.connect_to_local(
+                port=config["weaviate"]["port"],
+                grpc_port=config["weaviate"]["grpc_port"],
+            )
+
+    def _collection(self, reconnect: bool = False):
+        with self._lock:
+            if self._client is None:
+                atexit.register(self.close)
+            if self._client is None or reconnect:
+                self._connect()
+            return self._client.collections.get(self.collection_name)
+
+    def _query(self, fn, score=lambda metadata: metadata.score) -> List[SearchResult]:
         try:
-            client.close()
+            response = fn(self._collection().query)
         except Exception as e:
-            custom_logger.error(f"Error closing Weaviate client: {e}")
-            raise
+            if self.health_check():
+                raise
+            custom_logger.info_console(f"Weaviate query failed ({e}). Reconnecting...")
+            response = fn(self._collection(reconnect=True).query)
+        return [
+            (
+                item.properties["identifier"],
+                item.properties["text"],
+                str(item.uuid),
+                score(item.metadata),
+            )
+            for item in response.objects
+        ]
+
+    def _filter(self, filters: Optional[SearchFilters]):
+        """Weaviate filter for filters, restricted to properties the collection has."""
+        if filters is None:
+            return None
+        if self._properties is None:
+            try:
+                collection_config = self._collection().config.get()
+            except Exception as e:
+                custom_logger.error(f"Could not read the collection schema: {e}")
+                return None
+            self._properties = {p.name for p in collection_config.properties}
+            missing_filter_properties(self.collection_name, self._properties)
+        return build_weaviate_filter(filters, self._properties)
+
+    def health_check(self) -> bool:
+        try:
+            return self._client is not None and self._client.is_ready()
+        except Exception:
+            return False
+
+    def index_version(self) -> Optional[str]:
+        return read_index_version(self.collection_name)
+
+    def warm_up(self) -> None:
+        self._collection()
 
-    atexit.register(cleanup_weaviate)
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception as e:
+                    custom_logger.error(f"Error closing Weaviate client: {e}")
+                self._client = None
 
-    return collection
+    def hybrid(self, query, limit, auto_limit, vector=None, filters=None):
+        import weaviate.classes as wvc
 
+        if vector is None:
+            vector = get_encoder().embed([query])[0]
+        where = self._filter(filters)
+        return self._query(
+            lambda q: q.hybrid(
+                query=query,
+                query_properties=["text", "title"],
+                vector=vector,
+                alpha=config["search"]["alpha"],
+                limit=limit,
+                auto_limit=auto_limit,
+                filters=where,
+                fusion_type=wvc.query.HybridFusion.RELATIVE_SCORE,
+                return_metadata=wvc.query.MetadataQuery(score=True),
+            )
+        )
+
+    def bm25(self, query, limit, auto_limit=0, filters=None):
+        import weaviate.classes as wvc
+
+        where = self._filter(filters)
+        return self._query(
+            lambda q: q.bm25(
+                query=query,
+                query_properties=["text", "title"],
+                limit=limit,
+                auto_limit=auto_limit or None,
+                filters=where,
+                return_metadata=wvc.query.MetadataQuery(score=True),
+            )
+        )
+
+    def vector(self, vector, limit, auto_limit=0, filters=None):
+        import weaviate.classes as wvc
+
+        where = self._filter(filters)
+        # Report cosine similarity so that higher is better, as for the other searches.
+        return self._query(
+            lambda q: q.near_vector(
+                near_vector=vector,
+                limit=limit,
+                auto_limit=auto_limit or None,
+                filters=where,
+                return_metadata=wvc.query.MetadataQuery(distance=True),
+            ),
+            score=lambda metadata: 1 - metadata.distance,
+        )
 
-collection = initialize_weaviate()
 
+class LocalBackend(SearchBackend):
+    """Search backend on the in-process LocalHybridIndex, loaded on first use."""
 
-def hybrid_search(query: str, limit: int, auto_limit: int):
+    collection_name = "local"
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                from _core.local_search import LocalHybridIndex
+
+                with startup_timer.timed("local search index"):
+                    self._index = LocalHybridIndex.from_config()
+            return self._index
+
+    def warm_up(self) -> None:
+        self.index
+
+    def index_version(self) -> Optional[str]:
+        # The index is rebuilt from the parquet files, so their state is the version.
+        base = Path(__file__).resolve().parents[2]
+        stats = []
+        for key in ("chunks_file", "embeddings_file"):
+            path = base / config["local_search"][key]
+            if path.exists():
+                stat = path.stat()
+                stats.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+        return "|".join(stats) or None
+
+    def hybrid(self, query, limit, auto_limit, vector=None, filters=None):
+        return self.index.hybrid(
+            query, limit, auto_limit, vector=vector, filters=filters
+        )
+
+    def bm25(self, query, limit, auto_limit=0, filters=None):
+        return self.index.bm25(query, limit, auto_limit, filters=filters)
+
+    def vector(self, vector, limit, auto_limit=0, filters=None):
+        return self.index.vector(vector, limit, auto_limit, filters=filters)
+
+
+_backends: Dict[str, SearchBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend(name: str = None) -> SearchBackend:
+    """
+    Get or create the search backend configured in `search.backend`.
+
+    Backends connect lazily, so creating one is cheap. If `search_cache` is
+    enabled, the backend is wrapped in a result cache.
+    """
+    name = name or config["search"]["backend"]
+    with _backends_lock:
+        if name not in _backends:
+            if name == "weaviate":
+                backend = WeaviateBackend()
+            elif name == "weaviate_async":
+                from _core.search_async import AsyncWeaviateBackend
+
+                backend = AsyncWeaviateBackend()
+            elif name == "local":
+                backend = LocalBackend()
+            else:
+                raise ValueError(f"Unknown search backend: {name}")
+            if config["search_cache"]["enabled"]:
+                from _core.search_cache import CachedSearchBackend
+
+                backend = CachedSearchBackend.from_config(backend)
+            _backends[name] = backend
+        return _backends[name]
+
+
+def dedupe_queries(
+    queries: List[str], previous_queries: List[str], threshold: float
+) -> List[str]:
+    """
+    Drop queries that are near-duplicates of each other or of earlier queries.
+
+    Queries are kept in order. A query is dropped if the cosine similarity of its
+    embedding to a kept or previous query exceeds the threshold.
+
+    Args:
+        queries (List[str]): New queries.
+        previous_queries (List[str]): Queries of earlier iterations.
+        threshold (float): Cosine similarity above which a query counts as duplicate.
+
+    Returns:
+        List[str]: Queries to search.
+    """
+    if not queries:
+        return []
+    # Embeddings are normalized, so dot products are cosine similarities.
+    embeddings = get_encoder().embed(list(queries) + list(previous_queries))
+    seen = list(embeddings[len(queries) :])
+    kept = []
+    for query, embedding in zip(queries, embeddings[: len(queries)]):
+        if seen and float(np.max(np.stack(seen) @ embedding)) > threshold:
+            continue
+        kept.append(query)
+        seen.append(embedding)
+    return kept
+
+
+def hybrid_search(
+    query: str,
+    limit: int,
+    auto_limit: int,
+    vector=None,
+    backend: SearchBackend = None,
+    filters: Optional[SearchFilters] = None,
+):
     """
     Perform hybrid search using embeddings and keywords.
 
@@ -53,46 +515,154 @@ def hybrid_search(query: str, limit: int, auto_limit: int):
         query (str): Search query.
         limit (int): Max results.
         auto_limit (int): Max auto-expanded results.
+        vector (np.ndarray, optional): Precomputed query embedding.
+        backend (SearchBackend, optional): Backend to search. Uses config if None.
+        filters (SearchFilters, optional): Date and token count constraints.
 
     Returns:
-        list[tuple[str, str, str]]: Tuples of (identifier, text, uuid).
+        list[tuple[str, str, str, float]]: Tuples of (identifier, text, uuid, score).
     """
-    embeddings = encoder.embed([query])
-    if embeddings is None or len(embeddings) == 0:
-        return []
+    backend = backend or get_search_backend()
+    return backend.hybrid(query, limit, auto_limit, vector=vector, filters=filters)
+
+
+def fuse_results(
+    ranked_lists: List[List[SearchResult]],
+    rrf_k: int,
+    max_candidates: int = None,
+    exclude_uuids: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Merge per-query result lists with reciprocal rank fusion.
+
+    Each chunk scores sum(1 / (rrf_k + rank)) over the queries that returned it,
+    so chunks found by several queries rank first.
 
-    response = collection.query.hybrid(
-        query=query,
-        query_properties=["text", "title"],
-        vector=embeddings[0],
-        limit=limit,
-        auto_limit=auto_limit,
-        fusion_type=wvc.query.HybridFusion.RELATIVE_SCORE,
+    Args:
+        ranked_lists (List[List[SearchResult]]): Results per query, best first.
+        rrf_k (int): Rank offset; higher values flatten the rank weights.
+        max_candidates (int, optional): Keep only the top fused candidates.
+        exclude_uuids (Iterable[str]): Chunks to skip, e.g. seen in earlier iterations.
+
+    Returns:
+        pd.DataFrame: One row per chunk, sorted by rrf_score. score holds the
+            best hybrid search score of the chunk.
+    """
+    exclude = set(exclude_uuids)
+    fused: Dict[str, list] = {}
+    for results in ranked_lists:
+        for rank, (identifier, text, chunk_uuid, score) in enumerate(results, 1):
+            if chunk_uuid in exclude:
+                continue
+            if chunk_uuid not in fused:
+                fused[chunk_uuid] = [identifier, text, chunk_uuid, score, 0.0]
+            entry = fused[chunk_uuid]
+            entry[3] = max(entry[3], score)
+            entry[4] += 1 / (rrf_k + rank)
+
+    rows = sorted(fused.values(), key=lambda entry: entry[4], reverse=True)
+    if max_candidates:
+        rows = rows[:max_candidates]
+    return pd.DataFrame(
+        rows, columns=["identifier", "chunk_text", "uuid", "score", "rrf_score"]
     )
-    return [
-        (item.properties["identifier"], item.properties["text"], str(item.uuid))
-        for item in response.objects
-    ]
 
 
 def execute_searches(
     queries: List[str],
     limit: int,
     auto_limit: int,
+    backend: SearchBackend = None,
+    max_candidates: int = None,
+    exclude_uuids: Iterable[str] = (),
+    filters: Optional[SearchFilters] = None,
 ) -> pd.DataFrame:
     """
-    Run hybrid search for each query and aggregate results.
+    Run hybrid search for each query and fuse the results.
+
+    All queries are embedded in one batch and searched concurrently. A failing
+    query is logged and skipped. The result lists are merged with reciprocal
+    rank fusion and capped at max_candidates, so the number of candidates does
+    not grow with the number of queries.
 
     Args:
         queries (List[str]): List of queries.
         limit (int): Max results per query.
         auto_limit (int): Auto limit for hybrid search.
+        backend (SearchBackend, optional): Backend to search. Uses config if None.
+        max_candidates (int, optional): Max chunks returned over all queries.
+        exclude_uuids (Iterable[str]): Chunks to leave out before the cap.
+        filters (SearchFilters, optional): Date and token count constraints,
+            applied inside the index.
 
     Returns:
-        pd.DataFrame: Aggregated search results.
+        pd.DataFrame: Unique chunks ranked by fused score.
     """
-    results = []
-    for query in queries:
-        search_results = hybrid_search(query, limit=limit, auto_limit=auto_limit)
-        results.extend(search_results)
-    return pd.DataFrame(results, columns=["identifier", "chunk_text", "uuid"])
+    backend = backend or get_search_backend()
+    ranked_lists = []
+    if queries:
+        embeddings = get_encoder().embed(queries)
+        batch_results = backend.hybrid_batch(
+            queries,
+            limit=limit,
+            auto_limit=auto_limit,
+            vectors=embeddings,
+            filters=filters,
+        )
+        for query, result in zip(queries, batch_results):
+            if isinstance(result, Exception):
+                custom_logger.error(f"Search failed for query '{query}': {result}")
+            else:
+                ranked_lists.append(result)
+    return fuse_results(
+        ranked_lists,
+        rrf_k=config["search"]["rrf_k"],
+        max_candidates=max_candidates,
+        exclude_uuids=exclude_uuids,
+    )
+
+
+# Separates the chunks of one document in aggregated results.
+CHUNK_SEPARATOR = "\n\n[...]\n\n"
+
+
+def aggregate_by_document(
+    search_results: pd.DataFrame, chunks_per_document: int
+) -> pd.DataFrame:
+    """
+    Group chunk hits by document and keep the best chunks of each document.
+
+    Chunks and documents are ranked by rrf_score, which is comparable across
+    queries, and by the per-query hybrid score only if rrf_score is missing.
+
+    Args:
+        search_results (pd.DataFrame): Chunk results from execute_searches.
+        chunks_per_document (int): Max chunks kept per document, by fusion score.
+
+    Returns:
+        pd.DataFrame: One row per identifier, best document first, with the kept
+            chunks joined in chunk_text, their uuids, the best rank score of the
+            document in rrf_score (if given), its best hybrid score and the number
+            of hits.
+    """
+    rank_by = "rrf_score" if "rrf_score" in search_results else "score"
+    columns = ["identifier", "chunk_text", "uuid", "score", "hits"]
+    if rank_by == "rrf_score":
+        columns.insert(4, "rrf_score")
+    if len(search_results) == 0:
+        return pd.DataFrame(columns=columns)
+
+    ranked = search_results.sort_values(rank_by, ascending=False, kind="stable")
+    rows = []
+    for identifier, group in ranked.groupby("identifier", sort=False):
+        top = group.head(chunks_per_document)
+        row = [
+            identifier,
+            CHUNK_SEPARATOR.join(top["chunk_text"]),
+            top["uuid"].tolist(),
+            group["score"].max(),
+        ]
+        if rank_by == "rrf_score":
+            row.append(top["rrf_score"].iloc[0])
+        rows.append((*row, len(group)))
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,251 @@
+import asyncio
+import atexit
+from typing import Optional, Set
+import numpy as np
+import weaviate
+import weaviate.classes as wvc
+from _core.config import config
+from _core.embeddings import get_encoder
+from _core.logger import custom_logger
+from _core.models import SearchFilters
+from _core.search import (
+    SearchBackend,
+    build_weaviate_filter,
+    missing_filter_properties,
+    read_index_version,
+)
+from _core.utils import run_async
+
+
+class AsyncSearchClient:
+    """
+    Weaviate async client living on the shared event loop.
+
+    The connection opens on first use, is re-opened if it dropped, and is
+    closed when the app exits. Use only from the shared loop (see utils.run_async).
+    """
+
+    def __init__(self, collection_name: str = None):
+        self.collection_name = collection_name or config["weaviate"]["collection_name"]
+        self._client: Optional[weaviate.WeaviateAsyncClient] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._properties: Optional[Set[str]] = None
+
+    async def get_collection(self):
+        """Return the collection, connecting first if needed."""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._client is None:
+                self._client = weaviate.use_async_with_local(
+                    port=config["weaviate"]["port"],
+                    grpc_port=config["weaviate"]["grpc_port"],
+                )
+                atexit.register(self._close_at_exit)
+            if not self._client.is_connected():
+                await self._client.connect()
+        return self._client.collections.get(self.collection_name)
+
+    async def build_filter(self, filters: Optional[SearchFilters]):
+        """Weaviate filter for filters, restricted to properties the collection has."""
+        if filters is None:
+            return None
+        if self._properties is None:
+            try:
+                collection = await self.get_collection()
+                collection_config = await collection.config.get()
+            except Exception as e:
+                custom_logger.error(f"Could not read the collection schema: {e}")
+                return None
+            self._properties = {p.name for p in collection_config.properties}
+            missing_filter_properties(self.collection_name, self._properties)
+        return build_weaviate_filter(filters, self._properties)
+
+    async def is_ready(self) -> bool:
+        """Whether the Weaviate server is up, connecting first if needed."""
+        await self.get_collection()
+        return await self._client.is_ready()
+
+    async def close(self) -> None:
+        if self._client is not None and self._client.is_connected():
+            await self._client.close()
+
+    def _close_at_exit(self) -> None:
+        try:
+            run_async(self.close())
+        except Exception as e:
+            custom_logger.error(f"Error closing async Weaviate client: {e}")
+
+
+async_search_client = AsyncSearchClient()
+
+
+async def _aembed(texts):
+    """Embed texts in a worker thread, so encoding does not block the shared loop."""
+    return await asyncio.to_thread(get_encoder().embed, texts)
+
+
+def _to_results(response, score=lambda metadata: metadata.score):
+    return [
+        (
+            item.properties["identifier"],
+            item.properties["text"],
+            str(item.uuid),
+            score(item.metadata),
+        )
+        for item in response.objects
+    ]
+
+
+async def ahybrid_search(
+    query: str,
+    limit: int,
+    auto_limit: int,
+    vector=None,
+    filters: Optional[SearchFilters] = None,
+):
+    """
+    Perform hybrid search with the async Weaviate client.
+
+    Args:
+        query (str): Search query.
+        limit (int): Max results.
+        auto_limit (int): Max auto-expanded results.
+        vector (np.ndarray, optional): Precomputed query embedding.
+        filters (SearchFilters, optional): Date and token count constraints.
+
+    Returns:
+        list[tuple[str, str, str, float]]: Tuples of (identifier, text, uuid, score).
+    """
+    if vector is None:
+        embeddings = await _aembed([query])
+        if embeddings is None or len(embeddings) == 0:
+            return []
+        vector = embeddings[0]
+
+    collection = await async_search_client.get_collection()
+    response = await collection.query.hybrid(
+        query=query,
+        query_properties=["text", "title"],
+        vector=vector,
+        alpha=config["search"]["alpha"],
+        limit=limit,
+        auto_limit=auto_limit,
+        filters=await async_search_client.build_filter(filters),
+        fusion_type=wvc.query.HybridFusion.RELATIVE_SCORE,
+        return_metadata=wvc.query.MetadataQuery(score=True),
+    )
+    return _to_results(response)
+
+
+async def abm25_search(
+    query: str,
+    limit: int,
+    auto_limit: int = 0,
+    filters: Optional[SearchFilters] = None,
+):
+    """Keyword search with the async Weaviate client."""
+    collection = await async_search_client.get_collection()
+    response = await collection.query.bm25(
+        query=query,
+        query_properties=["text", "title"],
+        limit=limit,
+        auto_limit=auto_limit or None,
+        filters=await async_search_client.build_filter(filters),
+        return_metadata=wvc.query.MetadataQuery(score=True),
+    )
+    return _to_results(response)
+
+
+async def avector_search(
+    vector: np.ndarray,
+    limit: int,
+    auto_limit: int = 0,
+    filters: Optional[SearchFilters] = None,
+):
+    """Vector search with the async Weaviate client, scored by cosine similarity."""
+    collection = await async_search_client.get_collection()
+    response = await collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        auto_limit=auto_limit or None,
+        filters=await async_search_client.build_filter(filters),
+        return_metadata=wvc.query.MetadataQuery(distance=True),
+    )
+    return _to_results(response, score=lambda metadata: 1 - metadata.distance)
+
+
+async def _gather_limited(coros) -> list:
+    """Await coroutines with bounded concurrency, returning exceptions in place."""
+    semaphore = asyncio.Semaphore(config["search"]["max_concurrent_searches"])
+
+    async def _limited(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(
+        *(_limited(coro) for coro in coros), return_exceptions=True
+    )
+
+
+class AsyncWeaviateBackend(SearchBackend):
+    """
+    Search backend on the async Weaviate client.
+
+    Batches run as concurrent coroutines on the shared event loop instead of a
+    thread pool. The connection opens on first use.
+    """
+
+    def __init__(self, client: AsyncSearchClient = None):
+        self.client = client or async_search_client
+        self.collection_name = self.client.collection_name
+
+    def index_version(self) -> Optional[str]:
+        return read_index_version(self.collection_name)
+
+    def warm_up(self) -> None:
+        run_async(self.client.get_collection())
+
+    def health_check(self) -> bool:
+        try:
+            return run_async(self.client.is_ready())
+        except Exception:
+            return False
+
+    def hybrid(self, query, limit, auto_limit, vector=None, filters=None):
+        return run_async(
+            ahybrid_search(query, limit, auto_limit, vector=vector, filters=filters)
+        )
+
+    def bm25(self, query, limit, auto_limit=0, filters=None):
+        return run_async(abm25_search(query, limit, auto_limit, filters=filters))
+
+    def vector(self, vector, limit, auto_limit=0, filters=None):
+        return run_async(avector_search(vector, limit, auto_limit, filters=filters))
+
+    def hybrid_batch(self, queries, limit, auto_limit, vectors=None, filters=None):
+        async def _batch():
+            nonlocal vectors
+            if vectors is None:
+                vectors = await _aembed(queries) if queries else []
+            return await _gather_limited(
+                ahybrid_search(q, limit, auto_limit, vector=v, filters=filters)
+                for q, v in zip(queries, vectors)
+            )
+
+        return run_async(_batch())
+
+    def bm25_batch(self, queries, limit, auto_limit=0, filters=None):
+        return run_async(
+            _gather_limited(
+                abm25_search(q, limit, auto_limit, filters=filters) for q in queries
+            )
+        )
+
+    def vector_batch(self, vectors, limit, auto_limit=0, filters=None):
+        return run_async(
+            _gather_limited(
+                avector_search(v, limit, auto_limit, filters=filters) for v in vectors
+            )
+        )
+
@@ -0,0 +1,212 @@
+import json
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+from _core.cache import ResponseCache, make_cache_key, resolve_cache_path
+from _core.config import config
+from _core.logger import custom_logger
+from _core.models import SearchFilters
+from _core.search import SearchBackend, SearchResult
+
+
+def normalize_query(query: str) -> str:
+    """Normalize unicode and whitespace so trivially different queries share a key."""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class SearchResultCache:
+    """
+    Two-tier cache of search results: an in-memory LRU and an optional SQLite tier.
+
+    Keys include the index version, so re-indexing invalidates all entries.
+    """
+
+    def __init__(self, max_entries: int, disk: Optional[ResponseCache] = None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: OrderedDict[str, List[SearchResult]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls) -> "SearchResultCache":
+        cache_config = config["search_cache"]
+        disk = None
+        if cache_config["disk_enabled"]:
+            try:
+                disk = ResponseCache(
+                    path=resolve_cache_path(cache_config["path"]),
+                    max_size_mb=cache_config["max_size_mb"],
+                    max_age_days=cache_config["max_age_days"],
+                )
+            except sqlite3.Error as e:
+                custom_logger.error(
+                    f"Could not open search cache at {cache_config['path']}: {e}"
+                )
+        return cls(max_entries=cache_config["max_entries"], disk=disk)
+
+    def get(self, key: str) -> Optional[List[SearchResult]]:
+        """Return cached results for key, or None."""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(results)
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                results = [tuple(row) for row in json.loads(value)]
+                self._remember(key, results)
+                with self._lock:
+                    self.hits += 1
+                return list(results)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, results: List[SearchResult]) -> None:
+        """Store results under key in both tiers."""
+        self._remember(key, list(results))
+        if self.disk is not None:
+            self.disk.set(key, json.dumps(results, ensure_ascii=False))
+
+    def _remember(self, key: str, results: List[SearchResult]) -> None:
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of entries in memory."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class CachedSearchBackend(SearchBackend):
+    """
+    Wraps a search backend with a cache for hybrid search results.
+
+    Keyword and vector searches are passed through uncached. So are all searches
+    while the backend reports no index version, since a re-index could then not
+    invalidate the cached results.
+    """
+
+    # Fusion type used by all backends' hybrid search.
+    FUSION_TYPE = "relative_score"
+
+    def __init__(self, backend: SearchBackend, cache: SearchResultCache):
+        self.backend = backend
+        self.cache = cache
+        self.collection_name = backend.collection_name
+        self._warned_unversioned = False
+
+    @classmethod
+    def from_config(cls, backend: SearchBackend) -> "CachedSearchBackend":
+        return cls(backend, SearchResultCache.from_config())
+
+    def _key(
+        self,
+        query: str,
+        limit: int,
+        auto_limit: int,
+        index_version: str,
+        filters: Optional[SearchFilters],
+    ) -> str:
+        return make_cache_key(
+            query=normalize_query(query),
+            limit=limit,
+            auto_limit=auto_limit,
+            filters=filters.model_dump() if filters else None,
+            fusion_type=self.FUSION_TYPE,
+            collection=self.collection_name,
+            index_version=index_version,
+            embedding_model=(
+                config["sentence_transformers"]["backend"],
+                config["sentence_transformers"]["model_path"],
+            ),
+        )
+
+    def _current_index_version(self) -> Optional[str]:
+        index_version = self.backend.index_version()
+        if index_version is None and not self._warned_unversioned:
+            custom_logger.info_console(
+                f"No index version for {self.collection_name}. "
+                "Search results are not cached until the data is re-indexed."
+            )
+            self._warned_unversioned = True
+        return index_version
+
+    def health_check(self) -> bool:
+        return self.backend.health_check()
+
+    def warm_up(self) -> None:
+        self.backend.warm_up()
+
+    def index_version(self) -> Optional[str]:
+        return self.backend.index_version()
+
+    def hybrid(self, query, limit, auto_limit, vector=None, filters=None):
+        index_version = self._current_index_version()
+        if index_version is None:
+            return self.backend.hybrid(
+                query, limit, auto_limit, vector=vector, filters=filters
+            )
+        key = self._key(query, limit, auto_limit, index_version, filters)
+        results = self.cache.get(key)
+        if results is None:
+            results = self.backend.hybrid(
+                query, limit, auto_limit, vector=vector, filters=filters
+            )
+            self.cache.set(key, results)
+        return results
+
+    def hybrid_batch(self, queries, limit, auto_limit, vectors=None, filters=None):
+        index_version = self._current_index_version()
+        if index_version is None:
+            return self.backend.hybrid_batch(
+                queries, limit, auto_limit, vectors=vectors, filters=filters
+            )
+        keys = [
+            self._key(q, limit, auto_limit, index_version, filters) for q in queries
+        ]
+        results = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fetched = self.backend.hybrid_batch(
+                [queries[i] for i in missing],
+                limit,
+                auto_limit,
+                vectors=None if vectors is None else [vectors[i] for i in missing],
+                filters=filters,
+            )
+            for i, result in zip(missing, fetched):
+                results[i] = result
+                if not isinstance(result, Exception):
+                    self.cache.set(keys[i], result)
+        return results
+
+    def bm25(self, query, limit, auto_limit=0, filters=None):
+        return self.backend.bm25(query, limit, auto_limit, filters=filters)
+
+    def vector(self, vector, limit, auto_limit=0, filters=None):
+        return self.backend.vector(vector, limit, auto_limit, filters=filters)
+
+    def bm25_batch(self, queries, limit, auto_limit=0, filters=None):
+        return self.backend.bm25_batch(queries, limit, auto_limit, filters=filters)
+
+    def vector_batch(self, vectors, limit, auto_limit=0, filters=None):
+        return self.backend.vector_batch(vectors, limit, auto_limit, filters=filters)
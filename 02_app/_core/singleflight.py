@@ -0,0 +1,112 @@
+import asyncio
+import concurrent.futures
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict
+
+
+@dataclass
+class _Flight:
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future)
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one underlying call.
+
+    Unlike a cache, a result is only shared with callers that arrive while the
+    call is in flight. Threads and coroutines on the shared event loop can join
+    each other's flights, since both wait on the same concurrent future.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key: str) -> tuple[_Flight, bool]:
+        """Return the flight for key and whether the caller leads it."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.shared += 1
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            return flight, True
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def _leave(self, flight: _Flight) -> None:
+        with self._lock:
+            flight.waiters -= 1
+
+    @staticmethod
+    def _settle(flight: _Flight, result: Any = None, error: BaseException = None):
+        # The future may already be settled if the leader was cancelled.
+        if flight.future.done():
+            return
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the identical call already in flight."""
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            self._settle(flight, error=e)
+            raise
+        self._finish(key)
+        self._settle(flight, result=result)
+        return result
+
+    async def ado(self, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of do. Must be awaited on the shared event loop."""
+        flight, leader = self._join(key)
+        if not leader:
+            # Shielded, so cancelling one follower does not cancel the shared future.
+            try:
+                return await asyncio.shield(asyncio.wrap_future(flight.future))
+            except asyncio.CancelledError:
+                self._leave(flight)
+                raise
+
+        task = asyncio.ensure_future(coro_fn())
+
+        def _resolve(done: asyncio.Future):
+            self._finish(key)
+            if done.cancelled():
+                self._settle(flight, error=asyncio.CancelledError())
+            elif done.exception() is not None:
+                self._settle(flight, error=done.exception())
+            else:
+                self._settle(flight, result=done.result())
+
+        task.add_done_callback(_resolve)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Keep the call running if other callers are waiting for it.
+            with self._lock:
+                orphaned = flight.waiters == 0
+            if orphaned:
+                task.cancel()
+            raise
+
+    def stats(self) -> dict:
+        """Return the number of calls and how many of them joined an existing flight."""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared}
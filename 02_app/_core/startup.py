@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from _core.logger import custom_logger
+
+
+class StartupTimer:
+    """Records how long each subsystem took to initialize."""
+
+    def __init__(self):
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._timings[name] = seconds
+
+    @contextmanager
+    def timed(self, name: str):
+        """Time the enclosed block and log it as the init time of name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.record(name, seconds)
+            custom_logger.info_console(f"Initialized {name} in {seconds:.2f}s")
+
+    def timings(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._timings)
+
+    def report(self) -> str:
+        """One-line summary of all recorded init times."""
+        return ", ".join(
+            f"{name}: {seconds:.2f}s" for name, seconds in self.timings().items()
+        )
+
+
+startup_timer = StartupTimer()
+
+
+def warm_up(background: bool = True) -> None:
+    """
+    Initialize the embedding model, search backend and LLM client ahead of the first query.
+
+    Every subsystem also initializes itself on first use, so warm-up only moves
+    that cost out of the first research run. Failures are logged, not raised.
+    """
+
+    def _run():
+        # Imported here so that importing this module stays cheap.
+        from _core.embeddings import get_encoder
+        from _core.llm_client import get_llm_client
+        from _core.search import get_search_backend
+
+        for name, init in (
+            ("embeddings", lambda: get_encoder().embed(["warm-up"])),
+            ("search backend", lambda: get_search_backend().warm_up()),
+            ("llm client", get_llm_client),
+        ):
+            try:
+                init()
+            except Exception as e:
+                custom_logger.error(f"Warm-up of {name} failed: {e}")
+        custom_logger.info_console(f"Warm-up finished: {startup_timer.report()}")
+
+    if background:
+        threading.Thread(target=_run, name="warm-up", daemon=True).start()
+    else:
+        _run()
@@ -0,0 +1,155 @@
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+
+def _get(obj: Any, name: str) -> Any:
+    """Read a field from an OpenAI usage object or a raw usage dict."""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+@dataclass
+class UsageRecord:
+    step: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+    cache_hit: bool = False
+
+
+class UsageLedger:
+    """Records tokens, cost, latency and model of every LLM call in a research run."""
+
+    def __init__(self):
+        self._records: List[UsageRecord] = []
+        self._hedges: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        step: str,
+        model: str,
+        usage: Any = None,
+        latency: float = 0.0,
+        cache_hit: bool = False,
+    ) -> None:
+        """
+        Record one call.
+
+        Args:
+            step (str): Workflow step, e.g. "check_relevance".
+            model (str): Model id.
+            usage (Any): OpenAI usage object or OpenRouter usage dict.
+            latency (float): Call latency in seconds.
+            cache_hit (bool): Whether the result was served from the response cache.
+        """
+        record = UsageRecord(
+            step=step or "unknown",
+            model=model,
+            prompt_tokens=_get(usage, "prompt_tokens") or 0,
+            completion_tokens=_get(usage, "completion_tokens") or 0,
+            cached_tokens=_get(_get(usage, "prompt_tokens_details"), "cached_tokens")
+            or 0,
+            # OpenRouter reports the cost in credits when usage accounting is included.
+            cost=_get(usage, "cost") or 0.0,
+            latency=latency,
+            cache_hit=cache_hit,
+        )
+        with self._lock:
+            self._records.append(record)
+
+    def record_hedge(
+        self, step: Optional[str], won: bool, loser_cancelled: bool = False
+    ) -> None:
+        """
+        Record that a hedged request fired for step, whether it won and whether
+        the losing request was cancelled in flight.
+        """
+        with self._lock:
+            hedges = self._hedges.setdefault(
+                step or "unknown", {"fired": 0, "won": 0, "cancelled": 0}
+            )
+            hedges["fired"] += 1
+            hedges["won"] += int(won)
+            hedges["cancelled"] += int(loser_cancelled)
+
+    def records(self) -> List[dict]:
+        """Return all recorded calls."""
+        with self._lock:
+            return [asdict(record) for record in self._records]
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Aggregate calls, tokens and latency per step, plus a "total" entry.
+
+        Hedge losers cancelled in flight are counted in hedges_cancelled only. The
+        provider may still bill them, but their tokens and cost are never reported,
+        so they are not included in the token and cost totals.
+        """
+        with self._lock:
+            records = list(self._records)
+            hedges = {step: dict(counts) for step, counts in self._hedges.items()}
+
+        summary: Dict[str, dict] = {}
+        for key, selected in [(r.step, [r]) for r in records] + [("total", records)]:
+            entry = summary.setdefault(
+                key,
+                {
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_tokens": 0,
+                    "cost": 0.0,
+                    "latency_total": 0.0,
+                    "latency_max": 0.0,
+                    "hedges_fired": 0,
+                    "hedges_won": 0,
+                    "hedges_cancelled": 0,
+                    "models": [],
+                },
+            )
+            for record in selected:
+                entry["calls"] += 1
+                entry["cache_hits"] += int(record.cache_hit)
+                entry["prompt_tokens"] += record.prompt_tokens
+                entry["completion_tokens"] += record.completion_tokens
+                entry["cached_tokens"] += record.cached_tokens
+                entry["cost"] += record.cost
+                entry["latency_total"] += record.latency
+                entry["latency_max"] = max(entry["latency_max"], record.latency)
+                if record.model not in entry["models"]:
+                    entry["models"].append(record.model)
+
+        for step, counts in hedges.items():
+            for key in (step, "total"):
+                if key in summary:
+                    summary[key]["hedges_fired"] += counts["fired"]
+                    summary[key]["hedges_won"] += counts["won"]
+                    summary[key]["hedges_cancelled"] += counts["cancelled"]
+
+        for entry in summary.values():
+            entry["cost"] = round(entry["cost"], 6)
+            entry["latency_total"] = round(entry["latency_total"], 3)
+            entry["latency_max"] = round(entry["latency_max"], 3)
+        return summary
+
+
+def record_usage(
+    ledger: Optional[UsageLedger],
+    step: Optional[str],
+    model: str,
+    usage: Any = None,
+    latency: float = 0.0,
+    cache_hit: bool = False,
+) -> None:
+    """Record a call if a ledger is given."""
+    if ledger is not None:
+        ledger.record(step, model, usage, latency=latency, cache_hit=cache_hit)
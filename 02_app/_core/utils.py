@@ -1,6 +1,6 @@
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Callable, Any, Optional
+import asyncio
+import threading
+from typing import List, Callable, Any, Optional, Awaitable
 from tqdm import tqdm
 import tiktoken
 from datetime import datetime
@@ -58,6 +58,7 @@ def get_model_and_workflow_config(fast_mode=False):
             "max_queries": config["app"]["max_queries_dev"],
             "search_limit": config["app"]["search_limit_dev"],
             "auto_limit": config["app"]["search_auto_limit_dev"],
+            "max_candidates": config["app"]["max_candidates_dev"],
         }
     elif fast_mode:
         model_id = config["models"]["performance_low"]
@@ -75,6 +76,7 @@ def get_model_and_workflow_config(fast_mode=False):
             "max_queries": config["app"]["max_queries_fast"],
             "search_limit": config["app"]["search_limit_fast"],
             "auto_limit": config["app"]["search_auto_limit_fast"],
+            "max_candidates": config["app"]["max_candidates_fast"],
         }
     else:
         model_config = {
@@ -88,48 +90,90 @@ def get_model_and_workflow_config(fast_mode=False):
             "max_queries": config["app"]["max_queries"],
             "search_limit": config["app"]["search_limit"],
             "auto_limit": config["app"]["search_auto_limit"],
+            "max_candidates": config["app"]["max_candidates"],
         }
 
     return model_config, workflow_config
 
 
-def call_function_in_parallel(
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop for async calls, starting it on first use.
+
+    The loop runs in a single daemon thread. All async clients share it, so their
+    connection pools stay bound to one loop across Streamlit sessions.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="deep-research-event-loop", daemon=True
+            )
+            thread.start()
+            _event_loop = loop
+    return _event_loop
+
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine on the shared event loop and block until it returns.
+
+    Must not be called from within the shared loop itself.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+async def acall_function_in_parallel(
     prompt_list: List[str],
-    llm_function: Callable,
-    max_workers: int = None,
+    llm_function: Callable[..., Awaitable[Any]],
+    max_concurrency: int = None,
+    hedger: Any = None,
     **llm_kwargs,
 ) -> List[Any]:
     """
-    Run prompts in parallel using the given LLM function.
+    Run prompts concurrently using the given async LLM function.
 
     Args:
         prompt_list (List[str]): List of prompts.
-        llm_function (Callable): LLM function to call.
-        max_workers (int, optional): Max worker threads.
+        llm_function (Callable): Async LLM function to call.
+        max_concurrency (int, optional): Max requests in flight.
+        hedger (Hedger, optional): Hedges slow calls with a duplicate request.
         **llm_kwargs: Extra arguments for llm_function.
 
     Returns:
         List[Any]: Results for each prompt.
     """
-    max_workers = max_workers or config["parallelization"]["max_workers"]
+    max_concurrency = (
+        max_concurrency or config["parallelization"]["max_concurrent_requests"]
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
     results = [None] * len(prompt_list)
+    progress = tqdm(
+        total=len(prompt_list), desc="Processing LLM queries concurrently..."
+    )
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_index = {
-            executor.submit(llm_function, prompt, **llm_kwargs): i
-            for i, prompt in enumerate(prompt_list)
-        }
-
-        for future in tqdm(
-            concurrent.futures.as_completed(future_to_index),
-            total=len(prompt_list),
-            desc="Processing LLM queries in parallel...",
-        ):
-            index = future_to_index[future]
+    async def _run(index: int, prompt: str):
+        async with semaphore:
             try:
-                results[index] = future.result()
+                if hedger is not None:
+                    results[index] = await hedger.run(
+                        llm_function, prompt, **llm_kwargs
+                    )
+                else:
+                    results[index] = await llm_function(prompt, **llm_kwargs)
             except Exception as exc:
                 results[index] = f"Error: {exc}"
+        progress.update(1)
+
+    try:
+        await asyncio.gather(*(_run(i, prompt) for i, prompt in enumerate(prompt_list)))
+    finally:
+        progress.close()
 
     return results
 
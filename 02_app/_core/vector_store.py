@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from _core.logger import custom_logger
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class FlatVectorStore:
+    """Full-precision vectors in memory, scored exactly."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = np.ascontiguousarray(_normalize(vectors))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.vectors.nbytes
+
+    def scores(
+        self, query: np.ndarray, limit: int, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Cosine similarity of every vector to query."""
+        return self.vectors @ _normalize(query)
+
+
+class QuantizedVectorStore:
+    """
+    Int8 or binary codes in memory, rescored with full-precision vectors on disk.
+
+    Candidates are ranked on the compressed codes. The best limit * rescore_factor
+    of them are re-scored exactly with vectors read from a memory-mapped file, so
+    only the codes count towards RAM.
+    """
+
+    # Rows scored at once, bounding the temporary float32 copy of the codes.
+    BLOCK_SIZE = 16384
+
+    def __init__(
+        self,
+        mode: str,
+        codes: np.ndarray,
+        full_vectors: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        rescore_factor: int = 4,
+    ):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.codes = codes
+        self.full_vectors = full_vectors
+        self.scale = scale
+        self.rescore_factor = rescore_factor
+        self.dim = full_vectors.shape[1]
+
+    @classmethod
+    def build(
+        cls, vectors: np.ndarray, mode: str, rescore_factor: int = 4
+    ) -> "QuantizedVectorStore":
+        """Quantize vectors, keeping the full-precision array for rescoring."""
+        vectors = _normalize(vectors)
+        scale = None
+        if mode == "int8":
+            # Symmetric per-dimension scale, so that codes @ (scale * q) ~ vectors @ q.
+            scale = np.abs(vectors).max(axis=0) / 127
+            scale[scale == 0] = 1.0
+            codes = np.round(vectors / scale).astype(np.int8)
+        elif mode == "binary":
+            codes = np.packbits(vectors > 0, axis=1)
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        return cls(mode, codes, vectors, scale=scale, rescore_factor=rescore_factor)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in RAM; the full vectors stay on disk."""
+        return self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Score all vectors on the compressed codes."""
+        query = _normalize(query)
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        if self.mode == "int8":
+            weights = (self.scale * query).astype(np.float32)
+            for start in range(0, len(self.codes), self.BLOCK_SIZE):
+                block = self.codes[start : start + self.BLOCK_SIZE]
+                scores[start : start + len(block)] = block.astype(np.float32) @ weights
+        else:
+            # Asymmetric binary scoring: the query stays full precision, codes are
+            # signs, so the score is sum(q[bit == 1]) - sum(q[bit == 0]).
+            total = query.sum()
+            for start in range(0, len(self.codes), self.BLOCK_SIZE):
+                block = self.codes[start : start + self.BLOCK_SIZE]
+                bits = np.unpackbits(block, axis=1, count=self.dim)
+                scores[start : start + len(block)] = 2 * (bits @ query) - total
+        return scores
+
+    def scores(
+        self, query: np.ndarray, limit: int, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Exact cosine similarity for the rescored candidates, -inf for all others.
+
+        Args:
+            query (np.ndarray): Query vector.
+            limit (int): Number of results the caller needs.
+            mask (np.ndarray, optional): Only vectors where mask is True are candidates.
+        """
+        approx = self.approximate_scores(query)
+        if mask is not None:
+            approx[~mask] = -np.inf
+        allowed = len(approx) if mask is None else int(mask.sum())
+        n_candidates = min(limit * self.rescore_factor, allowed)
+
+        result = np.full(len(approx), -np.inf, dtype=np.float32)
+        if n_candidates <= 0:
+            return result
+        candidates = np.argpartition(-approx, n_candidates - 1)[:n_candidates]
+        # Sorted indices read the memory-mapped file front to back.
+        candidates.sort()
+        result[candidates] = self.full_vectors[candidates] @ _normalize(query)
+        return result
+
+    def save(self, directory: Path, source: dict) -> None:
+        """Write codes, full vectors and metadata about the source file."""
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors_f32.npy", np.asarray(self.full_vectors))
+        np.save(directory / f"codes_{self.mode}.npy", self.codes)
+        if self.scale is not None:
+            np.save(directory / "scale_int8.npy", self.scale)
+        meta = {"source": source, "count": len(self), "dim": self.dim}
+        (directory / f"meta_{self.mode}.json").write_text(json.dumps(meta))
+
+    @classmethod
+    def load(
+        cls, directory: Path, mode: str, source: dict, rescore_factor: int = 4
+    ) -> Optional["QuantizedVectorStore"]:
+        """Open a saved store, or None if it is missing or built from another source."""
+        meta_file = directory / f"meta_{mode}.json"
+        try:
+            meta = json.loads(meta_file.read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("source") != source:
+            return None
+        try:
+            full_vectors = np.load(directory / "vectors_f32.npy", mmap_mode="r")
+            codes = np.load(directory / f"codes_{mode}.npy")
+            scale = np.load(directory / "scale_int8.npy") if mode == "int8" else None
+        except OSError as e:
+            custom_logger.error(f"Could not open vector store in {directory}: {e}")
+            return None
+        if len(full_vectors) != meta["count"] or len(codes) != meta["count"]:
+            return None
+        return cls(mode, codes, full_vectors, scale=scale, rescore_factor=rescore_factor)
+
+
+def source_fingerprint(path: Path) -> dict:
+    """Identify a source file by name, size and modification time."""
+    stat = path.stat()
+    return {"name": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
@@ -1,14 +1,27 @@
 import pandas as pd
-from typing import Dict, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, Any, Optional
 from _core.config import config
-from _core.search import execute_searches
+from _core.search import (
+    SearchBackend,
+    aggregate_by_document,
+    dedupe_queries,
+    execute_searches,
+    get_search_backend,
+)
 from _core.llm_processing import (
     create_queries,
+    extract_search_filters,
     analyze_documents,
     reflect_task_status,
     check_relevance,
 )
+from _core.embeddings import get_encoder
+from _core.hedging import hedger
+from _core.llm_client import ClientManager, get_llm_client
 from _core.logger import custom_logger
+from _core.search_cache import CachedSearchBackend
+from _core.usage import UsageLedger
 
 
 class ResearchWorkflow:
@@ -18,12 +31,14 @@ class ResearchWorkflow:
         workflow_config: Dict[str, Any],
         model_config: Dict[str, Any],
         iterative_workflow: bool = False,
+        search_backend: Optional[SearchBackend] = None,
     ):
         self.docs = docs
         self.config = config
         self.workflow_config = workflow_config
         self.model_config = model_config
         self.iterative_workflow = iterative_workflow
+        self.search_backend = search_backend or get_search_backend()
         self.logger = custom_logger
         self._initialize_state()
 
@@ -35,7 +50,9 @@ class ResearchWorkflow:
         self.previous_considerations = []
         self.previous_analysis_results = []
         self.final_docs = None
+        self.search_filters = None
         self.iteration = 0
+        self.ledger = UsageLedger()
 
     def run_iteration(
         self,
@@ -48,14 +65,45 @@ class ResearchWorkflow:
         # Step 1: Create search queries
         status_callback("🧠 Erstelle Suchanfragen...", step_increment=1)
 
-        search_queries = create_queries(
-            user_query,
-            model_id=self.model_config["create_queries"],
-            max_queries=self.workflow_config["max_queries"],
-            previous_queries=self.previous_queries,
-            previous_considerations=self.previous_considerations,
-            first_iteration=(iteration == 0),
-        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # The date range of the question is extracted once, alongside the queries.
+            filters_future = None
+            if iteration == 0 and self.config["search"]["extract_date_filter"]:
+                filters_future = executor.submit(
+                    extract_search_filters,
+                    user_query,
+                    model_id=self.model_config["create_queries"],
+                    ledger=self.ledger,
+                )
+            search_queries = create_queries(
+                user_query,
+                model_id=self.model_config["create_queries"],
+                max_queries=self.workflow_config["max_queries"],
+                previous_queries=self.previous_queries,
+                previous_considerations=self.previous_considerations,
+                first_iteration=(iteration == 0),
+                ledger=self.ledger,
+            )
+            if filters_future is not None:
+                try:
+                    self.search_filters = filters_future.result()
+                except Exception as e:
+                    self.logger.error(f"Error extracting search filters: {e}")
+                if self.search_filters is not None:
+                    self.logger.info_console(
+                        f"Search filters: {self.search_filters.model_dump(exclude_none=True)}"
+                    )
+        if self.config["search"]["dedupe_queries"]:
+            unique_queries = dedupe_queries(
+                search_queries,
+                self.previous_queries,
+                threshold=self.config["search"]["dedupe_threshold"],
+            )
+            if len(unique_queries) < len(search_queries):
+                self.logger.info_console(
+                    f"Dropped {len(search_queries) - len(unique_queries)} near-duplicate queries."
+                )
+            search_queries = unique_queries
         self.previous_queries.extend(search_queries)
 
         if len(search_queries) == 0:
@@ -74,11 +122,11 @@ class ResearchWorkflow:
             search_queries,
             limit=self.workflow_config["search_limit"],
             auto_limit=self.workflow_config["auto_limit"],
+            backend=self.search_backend,
+            max_candidates=self.workflow_config["max_candidates"],
+            exclude_uuids=self.previous_chunk_ids,
+            filters=self.search_filters,
         )
-        search_results.drop_duplicates(subset=["uuid"], inplace=True)
-        search_results = search_results[
-            ~search_results.uuid.isin(self.previous_chunk_ids)
-        ]
         self.previous_chunk_ids.extend(search_results.uuid.unique().tolist())
 
         if len(search_results) == 0:
@@ -89,14 +137,35 @@ class ResearchWorkflow:
             )
 
         # Step 3: Check relevance
+        relevance_config = self.config["relevance"]
+        if relevance_config["aggregate_by_document"]:
+            # One check per new document instead of one per chunk.
+            search_results = search_results[
+                ~search_results.identifier.isin(self.previous_doc_ids)
+            ]
+            search_results = aggregate_by_document(
+                search_results, relevance_config["chunks_per_document"]
+            )
+
+        accepted, uncertain = self._gate_by_score(search_results)
         status_callback(
-            f"⚖️ Prüfe Relevanz von {len(search_results)} Dokumenten...",
+            f"⚖️ Prüfe Relevanz von {len(uncertain)} Dokumenten...",
             step_increment=1,
         )
 
-        relevance_checks = check_relevance(
-            user_query, search_results, model_id=self.model_config["check_relevance"]
-        )
+        relevance_checks = accepted
+        if len(uncertain) > 0:
+            relevance_checks = pd.concat(
+                [
+                    accepted,
+                    check_relevance(
+                        user_query,
+                        uncertain,
+                        model_id=self.model_config["check_relevance"],
+                        ledger=self.ledger,
+                    ),
+                ]
+            )
         relevant_doc_ids = relevance_checks.identifier.unique()
         relevant_doc_ids = [
             x for x in relevant_doc_ids if x not in self.previous_doc_ids
@@ -121,6 +190,7 @@ class ResearchWorkflow:
             document_ids=relevant_doc_ids,
             data=self.docs,
             model_id=self.model_config["analyze_documents"],
+            ledger=self.ledger,
         )
         self.previous_analysis_results.extend(analysis_results)
 
@@ -150,6 +220,7 @@ class ResearchWorkflow:
             user_query,
             "\n\n".join(self.previous_analysis_results),
             model_id=self.model_config["reflect_task"],
+            ledger=self.ledger,
         )
         self.previous_considerations.append(considerations)
 
@@ -160,6 +231,58 @@ class ResearchWorkflow:
 
         return finished or False, self.final_docs
 
+    def _gate_by_score(
+        self, search_results: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split search results by fusion score before the LLM relevance check.
+
+        Results at or above accept_above are accepted without a check, results below
+        reject_below are dropped. Only the band in between needs an LLM check.
+
+        Fused scores are min-max normalized per query, so they rank results within
+        a query rather than measure relevance; the gate is therefore off by default.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Accepted and uncertain results.
+        """
+        gate = self.config["relevance"]["score_gate"]
+        if not gate["enabled"]:
+            return search_results.iloc[0:0].copy(), search_results.copy()
+
+        scores = search_results["score"]
+        accepted = search_results[scores >= gate["accept_above"]].copy()
+        accepted["relevance"] = True
+        accepted["reasoning"] = "Automatisch akzeptiert (hoher Suchscore)"
+        uncertain = search_results[
+            (scores >= gate["reject_below"]) & (scores < gate["accept_above"])
+        ].copy()
+
+        self.logger.info_console(
+            f"Score gate: {len(accepted)} accepted, {len(uncertain)} to check, "
+            f"{len(search_results) - len(accepted) - len(uncertain)} dropped."
+        )
+        return accepted, uncertain
+
+    def get_cache_stats(self) -> Dict[str, dict]:
+        """
+        Hit rates of the caches, request dedupe and hedging.
+
+        The counters are shared by all runs, so they accumulate since app start.
+        """
+        client = get_llm_client()
+        stats = {
+            "embeddings": get_encoder().cache_stats(),
+            "singleflight": ClientManager.get_singleflight().stats(),
+        }
+        if getattr(client, "cache", None) is not None:
+            stats["llm_responses"] = client.cache.stats()
+        if isinstance(self.search_backend, CachedSearchBackend):
+            stats["search_results"] = self.search_backend.cache.stats()
+        if hedger is not None:
+            stats["hedging"] = hedger.stats()
+        return stats
+
     def get_results(self) -> Dict[str, Any]:
         """Get the results of the research workflow"""
         return {
@@ -167,4 +290,6 @@ class ResearchWorkflow:
             "search_results": self.previous_chunk_ids,
             "relevant_doc_ids": self.previous_doc_ids,
             "final_docs": self.final_docs,
+            "usage": self.ledger.summary(),
+            "cache_stats": self.get_cache_stats(),
         }
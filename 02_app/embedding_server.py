@@ -0,0 +1,195 @@
+"""
+Local embedding server shared by all app workers.
+
+Holds one embedding model and micro-batches concurrent requests into single
+forward passes. Start it from 02_app, then set
+`sentence_transformers.backend: "remote"` in config_app.yaml:
+
+    python embedding_server.py
+
+Endpoints:
+    POST /embed   {"texts": [...], "normalize": true} -> float32 matrix as
+                  application/octet-stream, shape in the X-Embedding-Shape header
+    GET  /health  {"status": "ok", ...}
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+import numpy as np
+from _core.config import config
+from _core.embeddings import BaseEmbeddingManager, create_encoder
+from _core.logger import custom_logger
+
+
+class MicroBatcher:
+    """
+    Collects concurrent embed requests and encodes them together.
+
+    A worker thread waits for the first request, then gathers more for up to
+    max_wait_ms or until max_batch_size texts are queued.
+    """
+
+    def __init__(
+        self, encoder: BaseEmbeddingManager, max_batch_size: int, max_wait_ms: float
+    ):
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[List[str], bool, Future]]" = queue.Queue()
+        self.batches = 0
+        self.requests = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str], normalize: bool) -> Future:
+        """Queue texts for embedding. The future resolves to an array."""
+        future = Future()
+        self._queue.put((texts, normalize, future))
+        return future
+
+    def _collect(self) -> list:
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            pending = self._collect()
+            for normalize in (True, False):
+                group = [item for item in pending if item[1] is normalize]
+                if group:
+                    self._encode_group(group, normalize)
+
+    def _encode_group(self, group: list, normalize: bool) -> None:
+        texts = [text for item in group for text in item[0]]
+        try:
+            embeddings = self.encoder.embed(texts, normalize=normalize)
+        except Exception as e:
+            for _, _, future in group:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.requests += len(group)
+        start = 0
+        for item_texts, _, future in group:
+            future.set_result(embeddings[start : start + len(item_texts)])
+            start += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0,
+        }
+
+
+def make_handler(batcher: MicroBatcher, backend: str):
+    class EmbeddingHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "Not found"})
+                return
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "backend": backend,
+                    "model": config["sentence_transformers"]["model_path"],
+                    **batcher.stats(),
+                },
+            )
+
+        def do_POST(self):
+            if self.path != "/embed":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                texts = request["texts"]
+                normalize = bool(request.get("normalize", True))
+                if not isinstance(texts, list) or not all(
+                    isinstance(t, str) for t in texts
+                ):
+                    raise ValueError("texts must be a list of strings")
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                embeddings = batcher.submit(texts, normalize).result()
+            except Exception as e:
+                custom_logger.error(f"Embedding request failed: {e}")
+                self._send_json(500, {"error": str(e)})
+                return
+
+            body = np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header(
+                "X-Embedding-Shape", ",".join(str(d) for d in embeddings.shape)
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Requests are frequent; do not log each one.
+            pass
+
+    return EmbeddingHandler
+
+
+def main():
+    server_config = config["embedding_server"]
+    backend = server_config["backend"]
+    if backend == "remote":
+        raise ValueError("embedding_server.backend must be a local backend.")
+
+    custom_logger.info_console(f"Loading {backend} embedding model...")
+    batcher = MicroBatcher(
+        create_encoder(backend),
+        max_batch_size=server_config["max_batch_size"],
+        max_wait_ms=server_config["max_wait_ms"],
+    )
+    server = ThreadingHTTPServer(
+        (server_config["host"], server_config["port"]),
+        make_handler(batcher, backend),
+    )
+    custom_logger.info_console(
+        f"Embedding server listening on {server_config['host']}:{server_config['port']}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Export, check and benchmark the int8-quantized ONNX query encoder.
+
+Run from 02_app:
+
+    python export_onnx_encoder.py export   # Export and quantize the model
+    python export_onnx_encoder.py check    # Cosine agreement with the torch encoder
+    python export_onnx_encoder.py bench    # Latency and memory of both backends
+
+Exporting needs torch and transformers (installed with sentence-transformers).
+Running the ONNX backend needs onnxruntime (`uv sync --extra onnx`).
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from _core.config import config
+from _core.embeddings import (
+    OnnxEmbeddingManager,
+    SentenceTransformerEmbeddingManager,
+    resolve_onnx_model_dir,
+)
+
+BASE_DIR = Path(__file__).resolve().parents[1]  # .../deep-research/
+
+
+def export(model_dir: Path, opset: int = 17) -> None:
+    """Export the transformer to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    model_path = config["sentence_transformers"]["model_path"]
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    model = AutoModel.from_pretrained(model_path).eval()
+    tokenizer.save_pretrained(model_dir)
+
+    dummy = tokenizer(["Beispieltext"], return_tensors="pt")
+    fp32_file = model_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_file),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+
+    quantized_file = model_dir / "model_quantized.onnx"
+    quantize_dynamic(str(fp32_file), str(quantized_file), weight_type=QuantType.QInt8)
+    size_mb = quantized_file.stat().st_size / 1024 / 1024
+    print(f"Exported {model_path} to {quantized_file} ({size_mb:.1f} MB).")
+
+
+def load_sample_texts(n: int) -> list:
+    """Titles (short, like queries) and text openings (long) of sample documents."""
+    docs = pd.read_parquet(BASE_DIR / config["app"]["docs_file"])
+    docs = docs.sample(n=min(n, len(docs)), random_state=0)
+    return docs["title"].tolist() + [text[:2000] for text in docs["text"]]
+
+
+def check(n: int, threshold: float) -> bool:
+    """Compare ONNX and torch embeddings on sample texts by cosine similarity."""
+    texts = load_sample_texts(n)
+    reference = SentenceTransformerEmbeddingManager()._encode(texts, normalize=True)
+    candidate = OnnxEmbeddingManager()._encode(texts, normalize=True)
+    cosine = np.sum(reference * candidate, axis=1)
+
+    print(f"Texts: {len(texts)}")
+    print(f"Cosine mean: {cosine.mean():.5f}")
+    print(f"Cosine p1:   {np.percentile(cosine, 1):.5f}")
+    print(f"Cosine min:  {cosine.min():.5f}")
+    passed = bool(cosine.min() >= threshold)
+    print("PASSED" if passed else f"FAILED: minimum below {threshold}")
+    return passed
+
+
+def _bench_backend(backend: str, texts: list, runs: int, queue) -> None:
+    start = time.perf_counter()
+    if backend == "onnx":
+        manager = OnnxEmbeddingManager()
+    else:
+        manager = SentenceTransformerEmbeddingManager()
+    load_time = time.perf_counter() - start
+
+    # Call _encode directly so the embedding cache does not hide the model cost.
+    manager._encode(texts[:1], normalize=True)
+    latencies = []
+    for i in range(runs):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        manager._encode([text], normalize=True)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    manager._encode(texts, normalize=True)
+    batch_time = time.perf_counter() - start
+
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+    queue.put(
+        {
+            "backend": backend,
+            "load_s": load_time,
+            "query_p50_ms": np.percentile(latencies, 50) * 1000,
+            "query_p95_ms": np.percentile(latencies, 95) * 1000,
+            f"batch_{len(texts)}_s": batch_time,
+            "max_rss_mb": max_rss_mb,
+        }
+    )
+
+
+def bench(n: int, runs: int) -> None:
+    """Benchmark both backends, each in a fresh process so memory is comparable."""
+    texts = load_sample_texts(n)[:n]
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in ("torch", "onnx"):
+        queue = context.Queue()
+        process = context.Process(
+            target=_bench_backend, args=(backend, texts, runs, queue)
+        )
+        process.start()
+        results.append(queue.get())
+        process.join()
+    print(pd.DataFrame(results).set_index("backend").round(2).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export and quantize.")
+    export_parser.add_argument("--opset", type=int, default=17)
+    check_parser = subparsers.add_parser("check", help="Parity with torch.")
+    check_parser.add_argument("--samples", type=int, default=200)
+    check_parser.add_argument("--threshold", type=float, default=0.98)
+    bench_parser = subparsers.add_parser("bench", help="Latency and memory.")
+    bench_parser.add_argument("--samples", type=int, default=64)
+    bench_parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(resolve_onnx_model_dir(), opset=args.opset)
+    elif args.command == "check":
+        sys.exit(0 if check(args.samples, args.threshold) else 1)
+    else:
+        bench(args.samples, args.runs)
+
+
+if __name__ == "__main__":
+    main()
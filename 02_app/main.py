@@ -1,21 +1,38 @@
-import streamlit as st
-import numpy as np
-import pandas as pd
-import re
-from datetime import datetime
-from pathlib import Path
-from _core.logger import custom_logger
-from _core.app_info import INFO_TEXT_MODAL, INFO_TEXT_SIDEBAR, SAMPLE_QUERY
-from _core.workflow import ResearchWorkflow
-from _core.llm_processing import create_final_report
-from _core.utils import get_model_and_workflow_config, create_docx_from_markdown
-from _core.config import config
+import time
+
+# Started before the other imports to measure how long they take.
+_import_start = time.perf_counter()
+
+import streamlit as st  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import re  # noqa: E402
+from datetime import datetime  # noqa: E402
+from pathlib import Path  # noqa: E402
+from _core.logger import custom_logger  # noqa: E402
+from _core.app_info import INFO_TEXT_MODAL, INFO_TEXT_SIDEBAR, SAMPLE_QUERY  # noqa: E402
+from _core.workflow import ResearchWorkflow  # noqa: E402
+from _core.llm_processing import create_final_report, stream_final_report  # noqa: E402
+from _core.utils import get_model_and_workflow_config, create_docx_from_markdown  # noqa: E402
+from _core.config import config  # noqa: E402
+from _core.startup import startup_timer, warm_up  # noqa: E402
+
+startup_timer.record("imports", time.perf_counter() - _import_start)
 
 
 @st.cache_resource()
 def load_data():
     """Load the decision data"""
-    return pd.read_parquet(config["app"]["docs_file"])
+    with startup_timer.timed("documents"):
+        return pd.read_parquet(config["app"]["docs_file"])
+
+
+@st.cache_resource()
+def start_warm_up():
+    """Warm up embeddings, search and LLM client once per process, in the background."""
+    custom_logger.info_console(f"Startup: {startup_timer.report()}")
+    if config["app"]["warm_up"]:
+        warm_up(background=True)
 
 
 @st.dialog(config["app_name"], width="large")
@@ -25,6 +42,7 @@ def info_dialog():
 
 def main():
     st.set_page_config(page_title=config["app_name"], page_icon="🔍", layout="wide")
+    start_warm_up()
 
     # Sidebar for configuration
     with st.sidebar:
@@ -212,18 +230,41 @@ def process_query(
     # Create final report
     progress_bar.progress(85)
 
+    placeholder = st.empty()
     with st.spinner(
         "Ich schreibe den Abschlussbericht. Dies kann einige Minuten dauern..."
     ):
-        final_report, usage = create_final_report(
-            user_query, final_docs, model_id=model_config["final_report"]
-        )
+        if config["llm"]["stream_final_report"]:
+            report_stream = stream_final_report(
+                user_query,
+                final_docs,
+                model_id=model_config["final_report"],
+                ledger=workflow.ledger,
+            )
+            # Re-rendering markdown is costly for long reports, so throttle updates.
+            last_render = 0.0
+            for _ in report_stream:
+                if time.perf_counter() - last_render > 0.2:
+                    placeholder.markdown(
+                        f"### Recherchebericht\n\n{report_stream.text}"
+                    )
+                    last_render = time.perf_counter()
+            final_report, usage = report_stream.text, report_stream.usage
+            report_failed = report_stream.error is not None
+        else:
+            final_report, usage = create_final_report(
+                user_query,
+                final_docs,
+                model_id=model_config["final_report"],
+                ledger=workflow.ledger,
+            )
+            report_failed = False
 
-    placeholder = st.empty()
     placeholder.markdown(f"### Recherchebericht\n\n{final_report}")
 
-    # Sometimes the LLMs fail in the last step, so we check if the final report is empty.
-    if final_report.strip() == "":
+    # Sometimes the LLMs fail in the last step, so we check if the final report is
+    # empty or if the stream broke off and left it incomplete.
+    if report_failed or final_report.strip() == "":
         st.error(
             "❌ Der Abschlussbericht konnte wegen eines Fehlers vom Sprachmodell nicht erstellt werden. Bitte versuche es erneut."
         )
@@ -244,6 +285,9 @@ def process_query(
     st.session_state.final_docs = results["final_docs"]
     st.session_state.final_report = final_report
     st.session_state.usage = usage
+    st.session_state.usage_by_step = results["usage"]
+    custom_logger.info_console(f"Usage by step: {results['usage']}")
+    custom_logger.info_console(f"Cache stats: {results['cache_stats']}")
 
 
 def display_results():
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from _core.local_search import LocalHybridIndex, autocut, tokenize
+from _core.models import SearchFilters
+
+
+@pytest.fixture
+def index():
+    chunks = pd.DataFrame(
+        {
+            "identifier": ["a", "a", "b", "c", "d"],
+            "title": ["Verkehr", "Verkehr", "Schule", "Budget", "Wald"],
+            "chunk_text": [
+                "Der Ausbau der S-Bahn im Kanton.",
+                "Velowege und Strassen im Kanton.",
+                "Die Schule braucht mehr Lehrpersonen.",
+                "Das Budget der Schule steigt.",
+                "Der Wald und die Biodiversität.",
+            ],
+            "date": pd.to_datetime(
+                ["2010-01-01", "2010-01-01", "2015-06-01", "2020-03-01", "2024-01-01"]
+            ),
+            "token_count": [100, 120, 300, 80, 50],
+        }
+    )
+    embeddings = np.eye(5, dtype=np.float32) + 0.1
+    return LocalHybridIndex(chunks, embeddings, alpha=0.75, k1=1.2, b=0.75)
+
+
+def test_tokenize_lowercases_and_splits_like_weaviate():
+    assert tokenize("Die S-Bahn, 2024!") == ["die", "s", "bahn", "2024"]
+    assert tokenize("") == []
+
+
+def test_autocut_cuts_at_the_first_jump():
+    scores = np.array([1.0, 0.99, 0.98, 0.5, 0.49])
+    assert autocut(scores, 1) == 3
+    assert autocut(scores, 0) == 5
+    assert autocut(np.array([0.7, 0.7, 0.7]), 1) == 3
+
+
+def test_bm25_ranks_keyword_matches_and_skips_the_rest(index):
+    results = index.bm25("Schule", limit=5)
+
+    assert [identifier for identifier, *_ in results] == ["b", "c"]
+    assert all(score > 0 for *_, score in results)
+    assert index.bm25("zzz", limit=5) == []
+
+
+def test_chunk_uuids_are_deterministic(index):
+    results = index.bm25("Kanton", limit=5)
+    assert {uuid for _, _, uuid, _ in results} == set(index.uuids[:2])
+    assert len(set(index.uuids)) == 5
+
+
+def test_hybrid_without_keyword_matches_returns_limit_results(index):
+    vector = np.array([1.0, 0.5, 0.2, 0.1, 0.0], dtype=np.float32)
+    results = index.hybrid("zzz", limit=3, auto_limit=0, vector=vector)
+
+    assert len(results) == 3
+    assert [uuid for _, _, uuid, _ in results] == index.uuids[:3]
+    # The weakest vector hit is normalized to 0 but still returned.
+    assert results[-1][3] == 0.0
+
+
+def test_hybrid_fuses_vector_and_keyword_scores(index):
+    # Vector search favours d, then b; keyword search finds b and c.
+    vector = np.array([0.0, 0.0, 0.3, 0.0, 1.0], dtype=np.float32)
+    results = index.hybrid("Schule", limit=3, auto_limit=0, vector=vector)
+
+    assert [identifier for identifier, *_ in results[:2]] == ["d", "b"]
+    # alpha weighs the vector score: d only by vector, b by 0.3 of it plus keywords.
+    assert results[0][3] == pytest.approx(0.75)
+    assert results[1][3] == pytest.approx(0.25 + 0.75 * 0.3, abs=0.01)
+
+
+def test_filters_restrict_all_searches(index):
+    filters = SearchFilters(date_from="2015-01-01", max_token_count=200)
+    vector = np.ones(5, dtype=np.float32)
+
+    assert [r[0] for r in index.bm25("Schule", limit=5, filters=filters)] == ["c"]
+    assert {r[0] for r in index.vector(vector, limit=5, filters=filters)} == {
+        "c",
+        "d",
+    }
+    results = index.hybrid("Schule", 5, 0, vector=vector, filters=filters)
+    assert {r[0] for r in results} == {"c", "d"}
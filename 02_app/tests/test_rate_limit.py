@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+import pytest
+from tenacity import wait_fixed
+from _core.rate_limit import (
+    ConcurrencyController,
+    retry_after_seconds,
+    status_code_of,
+    wait_retry_after,
+)
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def make_controller(**overrides):
+    settings = {
+        "requests_per_second": 1000,
+        "burst": 1000,
+        "initial_concurrency": 4,
+        "min_concurrency": 1,
+        "max_concurrency": 8,
+        "increase_step": 1,
+        "decrease_factor": 0.5,
+        "max_retry_after": 60,
+    }
+    settings.update(overrides)
+    return ConcurrencyController(**settings)
+
+
+def test_status_code_of_reads_response():
+    assert status_code_of(HTTPError(429)) == 429
+    assert status_code_of(ValueError()) is None
+    assert status_code_of(None) is None
+
+
+def test_retry_after_seconds_and_http_date():
+    assert retry_after_seconds(HTTPError(429, {"retry-after": "3"})) == 3.0
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    header = {"Retry-After": format_datetime(retry_at, usegmt=True)}
+    assert 25 < retry_after_seconds(HTTPError(503, header)) <= 30
+    assert retry_after_seconds(HTTPError(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(HTTPError(429)) is None
+
+
+def test_wait_retry_after_is_capped_and_falls_back():
+    wait = wait_retry_after(wait_fixed(1), max_wait=10)
+
+    def state(error):
+        return SimpleNamespace(outcome=SimpleNamespace(exception=lambda: error))
+
+    assert wait(state(HTTPError(429, {"retry-after": "5"}))) == 5
+    assert wait(state(HTTPError(429, {"retry-after": "120"}))) == 10
+    assert wait(state(HTTPError(500))) == 1
+
+
+def test_successes_grow_the_window_additively():
+    controller = make_controller()
+    for _ in range(4):
+        with controller.slot("model"):
+            pass
+    # Four successes at a window of ~4 add about one slot.
+    assert controller.stats()["model"]["concurrency"] == 4
+    assert 4.8 < controller._window("model").limit < 5
+
+
+def test_throttling_shrinks_the_window_once_per_burst():
+    controller = make_controller()
+    for _ in range(3):
+        with pytest.raises(HTTPError):
+            with controller.slot("model"):
+                raise HTTPError(429)
+    stats = controller.stats()["model"]
+    assert stats["concurrency"] == 2
+    assert stats["throttled"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_window_never_drops_below_min_concurrency():
+    controller = make_controller(initial_concurrency=1)
+    window = controller._window("model")
+    controller.release("model", HTTPError(503))
+    assert window.limit == 1
+
+
+def test_retry_after_pauses_the_model():
+    controller = make_controller()
+    controller._try_acquire("model")
+    controller.release("model", HTTPError(429, {"retry-after": "2"}))
+    assert controller.is_saturated("model")
+    assert 1.5 < controller._try_acquire("model") <= 2
+    assert not controller.is_saturated("other")
+
+
+def test_full_window_is_saturated():
+    controller = make_controller(initial_concurrency=2)
+    assert controller._try_acquire("model") == 0
+    assert controller._try_acquire("model") == 0
+    assert controller.is_saturated("model")
+    assert controller._try_acquire("model") > 0
+
+
+def test_cancelled_request_releases_without_adapting():
+    controller = make_controller()
+
+    async def main():
+        async def request():
+            async with controller.aslot("model"):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    window = controller._window("model")
+    assert window.in_flight == 0
+    assert window.limit == 4
+
+
+def test_async_slot_waits_for_a_free_window():
+    controller = make_controller(initial_concurrency=1)
+    active = []
+    peak = []
+
+    async def request():
+        async with controller.aslot("model"):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(request(), request())
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) >= 0.02
+    assert max(peak) == 1
@@ -0,0 +1,133 @@
+import json
+import re
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from _core import llm_processing
+from _core.config import config
+from _core.prompts import CHECK_RELEVANCE, CHECK_RELEVANCE_BATCH
+
+CHUNK_PATTERN = re.compile(r'<abschnitt id="(\d+)">\n(.*?)\n</abschnitt>', re.S)
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """Count words instead of tokens, so tests do not download a tokenizer."""
+    monkeypatch.setattr(
+        llm_processing.TokenCounter,
+        "count_tokens",
+        lambda text, model=None: len(text.split()),
+    )
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM fan-out that judges chunks containing "irrelevant" as irrelevant."""
+    calls = {"batch": [], "single": []}
+    responses = {}
+
+    async def fake_parallel(prompts, llm_function, system_message=None, **kwargs):
+        results = []
+        for prompt in prompts:
+            if system_message == CHECK_RELEVANCE_BATCH:
+                chunks = CHUNK_PATTERN.findall(prompt)
+                calls["batch"].append([text for _, text in chunks])
+                checks = [
+                    {
+                        "chunk_id": int(chunk_id),
+                        "reasoning": f"batch: {text}",
+                        "relevance": text.startswith("relevant"),
+                    }
+                    for chunk_id, text in chunks
+                ]
+                results.append(responses.get("batch", json.dumps({"checks": checks})))
+            else:
+                assert system_message == CHECK_RELEVANCE
+                calls["single"].append(prompt)
+                relevant = "irrelevant" not in prompt
+                results.append(
+                    json.dumps({"reasoning": "single", "relevance": relevant})
+                )
+        return results
+
+    monkeypatch.setattr(llm_processing, "acall_function_in_parallel", fake_parallel)
+    monkeypatch.setattr(
+        llm_processing,
+        "get_llm_client",
+        lambda: SimpleNamespace(acall_structured=None),
+    )
+    monkeypatch.setitem(config["relevance"], "batch_max_chunks", 2)
+    monkeypatch.setitem(config["relevance"], "batch_token_budget", 10_000)
+    return SimpleNamespace(calls=calls, responses=responses)
+
+
+def test_batch_by_token_budget_respects_items_and_tokens():
+    texts = ["a " * 10, "b " * 10, "c " * 10, "d " * 50]
+    assert llm_processing._batch_by_token_budget(texts, 1000, 2) == [[0, 1], [2, 3]]
+    assert llm_processing._batch_by_token_budget(texts, 25, 10) == [[0, 1], [2], [3]]
+    # A chunk above the budget still gets a batch of its own.
+    assert llm_processing._batch_by_token_budget(texts, 5, 10) == [
+        [0],
+        [1],
+        [2],
+        [3],
+    ]
+
+
+def test_batched_checks_map_verdicts_back_to_chunks(llm):
+    texts = ["relevant one", "irrelevant two", "relevant three"]
+    checks = llm_processing._check_relevance_batched("Frage", texts, "model")
+
+    assert llm.calls["batch"] == [texts[:2], texts[2:]]
+    assert llm.calls["single"] == []
+    assert checks == [
+        (True, "batch: relevant one"),
+        (False, "batch: irrelevant two"),
+        (True, "batch: relevant three"),
+    ]
+
+
+def test_missing_and_invalid_verdicts_fall_back_to_single_checks(llm):
+    llm.responses["batch"] = json.dumps(
+        {
+            "checks": [
+                {"chunk_id": 1, "reasoning": "ok", "relevance": "true"},
+                {"chunk_id": 2, "reasoning": "unsure", "relevance": None},
+                {"chunk_id": 7, "reasoning": "unknown id", "relevance": True},
+            ]
+        }
+    )
+    texts = ["relevant one", "relevant two", "irrelevant three"]
+    checks = llm_processing._check_relevance_batched("Frage", texts, "model")
+
+    # Chunk 1 of each batch got a verdict; the others are re-checked one by one.
+    assert checks[0] == (True, "ok")
+    assert checks[2] == (True, "ok")
+    assert len(llm.calls["single"]) == 1
+    assert "relevant two" in llm.calls["single"][0]
+    assert checks[1] == (True, "single")
+
+
+def test_unparseable_batch_falls_back_for_all_its_chunks(llm):
+    llm.responses["batch"] = "no json here"
+    texts = ["relevant one", "irrelevant two"]
+    checks = llm_processing._check_relevance_batched("Frage", texts, "model")
+
+    assert len(llm.calls["single"]) == 2
+    assert checks == [(True, "single"), (False, "single")]
+
+
+def test_check_relevance_keeps_relevant_rows(llm):
+    data = pd.DataFrame(
+        {
+            "identifier": ["a", "b", "c"],
+            "chunk_text": ["relevant one", "irrelevant two", "relevant three"],
+        }
+    )
+    relevant = llm_processing.check_relevance("Frage", data, model_id="model")
+
+    assert relevant["identifier"].tolist() == ["a", "c"]
+    assert relevant["reasoning"].tolist() == [
+        "batch: relevant one",
+        "batch: relevant three",
+    ]
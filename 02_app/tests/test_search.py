@@ -0,0 +1,78 @@
+import pytest
+from _core.search import CHUNK_SEPARATOR, aggregate_by_document, fuse_results
+
+
+def hits(*uuids, identifier="doc"):
+    return [
+        (identifier, f"text {uuid}", uuid, 1.0 - rank / 10)
+        for rank, uuid in enumerate(uuids)
+    ]
+
+
+def test_fuse_results_ranks_chunks_found_by_several_queries_first():
+    fused = fuse_results([hits("a", "b", "c"), hits("c", "d")], rrf_k=60)
+
+    assert fused["uuid"].tolist() == ["c", "a", "b", "d"]
+    assert fused.loc[0, "rrf_score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused["rrf_score"].is_monotonic_decreasing
+
+
+def test_fuse_results_keeps_the_best_hybrid_score():
+    fused = fuse_results([hits("a", "b"), hits("b")], rrf_k=60)
+    assert fused.set_index("uuid").loc["b", "score"] == 1.0
+
+
+def test_fuse_results_caps_candidates_after_fusion():
+    fused = fuse_results(
+        [hits("a", "b", "c", "d"), hits("d", "c")], rrf_k=60, max_candidates=2
+    )
+    assert fused["uuid"].tolist() == ["d", "c"]
+
+
+def test_fuse_results_excludes_seen_chunks_before_the_cap():
+    fused = fuse_results(
+        [hits("a", "b", "c")], rrf_k=60, max_candidates=2, exclude_uuids=["a"]
+    )
+    assert fused["uuid"].tolist() == ["b", "c"]
+
+
+def test_fuse_results_without_results():
+    fused = fuse_results([], rrf_k=60)
+    assert fused.empty
+    assert list(fused.columns) == [
+        "identifier",
+        "chunk_text",
+        "uuid",
+        "score",
+        "rrf_score",
+    ]
+
+
+def test_aggregate_by_document_ranks_by_rrf_score():
+    # "b" has the higher per-query score, but "a" ranks higher across queries.
+    results = fuse_results(
+        [
+            [("a", "a1", "a1", 0.4), ("b", "b1", "b1", 1.0)],
+            [("a", "a2", "a2", 0.3), ("a", "a1", "a1", 0.2)],
+        ],
+        rrf_k=60,
+    )
+    documents = aggregate_by_document(results, chunks_per_document=2)
+
+    assert documents["identifier"].tolist() == ["a", "b"]
+    first = documents.iloc[0]
+    assert first["chunk_text"] == CHUNK_SEPARATOR.join(["a1", "a2"])
+    assert first["uuid"] == ["a1", "a2"]
+    assert first["rrf_score"] == results["rrf_score"].max()
+    assert first["score"] == 0.4
+    assert first["hits"] == 2
+
+
+def test_aggregate_by_document_falls_back_to_score():
+    results = fuse_results([hits("x", "y", identifier="d")], rrf_k=60).drop(
+        columns=["rrf_score"]
+    )
+    documents = aggregate_by_document(results, chunks_per_document=1)
+
+    assert documents["uuid"].tolist() == [["x"]]
+    assert "rrf_score" not in documents
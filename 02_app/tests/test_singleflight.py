@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from _core.singleflight import SingleFlight
+
+
+def test_cancelled_follower_does_not_cancel_flight():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flight.ado("key", call))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(flight.ado("key", call)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(leader, followers[1]), followers[0].cancelled()
+
+    results, cancelled = asyncio.run(main())
+    assert results == ["result", "result"]
+    assert cancelled
+
+
+def test_cancelled_async_follower_of_sync_leader():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    leader_result = []
+
+    def call():
+        started.set()
+        release.wait(timeout=5)
+        return "result"
+
+    leader = threading.Thread(
+        target=lambda: leader_result.append(flight.do("key", call))
+    )
+    leader.start()
+    started.wait(timeout=5)
+
+    async def follow_and_cancel():
+        follower = asyncio.create_task(flight.ado("key", call))
+        await asyncio.sleep(0)
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+
+    asyncio.run(follow_and_cancel())
+    release.set()
+    leader.join(timeout=5)
+    assert leader_result == ["result"]
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from _core.vector_store import (
+    FlatVectorStore,
+    QuantizedVectorStore,
+    source_fingerprint,
+)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).normal(size=(2000, 64)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def queries(vectors):
+    # Perturbed copies of stored vectors, so every query has clear neighbours.
+    rng = np.random.default_rng(1)
+    picked = vectors[rng.choice(len(vectors), size=20, replace=False)]
+    return picked + rng.normal(scale=0.5, size=picked.shape).astype(np.float32)
+
+
+def top_k(scores, k):
+    order = np.argsort(-scores)[:k]
+    return set(order[np.isfinite(scores[order])])
+
+
+def recall(store, vectors, queries, k=10):
+    exact = FlatVectorStore(vectors)
+    found = [
+        len(top_k(store.scores(q, k), k) & top_k(exact.scores(q, k), k)) / k
+        for q in queries
+    ]
+    return float(np.mean(found))
+
+
+@pytest.mark.parametrize(
+    "mode, rescore_factor, min_recall", [("int8", 4, 0.95), ("binary", 20, 0.9)]
+)
+def test_rescoring_recovers_exact_neighbours(
+    vectors, queries, mode, rescore_factor, min_recall
+):
+    store = QuantizedVectorStore.build(vectors, mode, rescore_factor=rescore_factor)
+    assert recall(store, vectors, queries) >= min_recall
+    assert store.memory_bytes < FlatVectorStore(vectors).memory_bytes / 3
+
+
+def test_recall_grows_with_rescore_factor(vectors, queries):
+    store = QuantizedVectorStore.build(vectors, "binary")
+    recalls = []
+    for factor in (1, 4, 20):
+        store.rescore_factor = factor
+        recalls.append(recall(store, vectors, queries))
+    assert recalls == sorted(recalls)
+    assert recalls[0] < recalls[-1]
+
+
+def test_only_candidates_are_rescored(vectors, queries):
+    store = QuantizedVectorStore.build(vectors, "int8", rescore_factor=3)
+    scores = store.scores(queries[0], limit=5)
+
+    assert np.isfinite(scores).sum() == 15
+    exact = FlatVectorStore(vectors).scores(queries[0], 5)
+    finite = np.isfinite(scores)
+    np.testing.assert_allclose(scores[finite], exact[finite], rtol=1e-5)
+
+
+def test_mask_excludes_vectors(vectors, queries):
+    store = QuantizedVectorStore.build(vectors, "binary")
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[:3] = True
+    scores = store.scores(queries[0], limit=10, mask=mask)
+
+    assert np.flatnonzero(np.isfinite(scores)).tolist() == [0, 1, 2]
+
+
+def test_unknown_mode_is_rejected(vectors):
+    with pytest.raises(ValueError):
+        QuantizedVectorStore.build(vectors, "float16")
+
+
+def test_save_and_load_memory_maps_full_vectors(vectors, queries, tmp_path):
+    source = {"name": "embed.parq", "size": 1, "mtime_ns": 1}
+    built = QuantizedVectorStore.build(vectors, "int8")
+    built.save(tmp_path, source)
+
+    loaded = QuantizedVectorStore.load(tmp_path, "int8", source)
+    assert isinstance(loaded.full_vectors, np.memmap)
+    np.testing.assert_array_equal(loaded.codes, built.codes)
+    np.testing.assert_allclose(
+        loaded.scores(queries[0], 5), built.scores(queries[0], 5), rtol=1e-6
+    )
+
+
+def test_load_rejects_other_sources_and_missing_files(vectors, tmp_path):
+    source = {"name": "embed.parq", "size": 1, "mtime_ns": 1}
+    QuantizedVectorStore.build(vectors, "binary").save(tmp_path, source)
+
+    changed = {**source, "mtime_ns": 2}
+    assert QuantizedVectorStore.load(tmp_path, "binary", changed) is None
+    assert QuantizedVectorStore.load(tmp_path, "int8", source) is None
+    (tmp_path / "codes_binary.npy").unlink()
+    assert QuantizedVectorStore.load(tmp_path, "binary", source) is None
+
+
+def test_source_fingerprint_changes_with_the_file(tmp_path):
+    path = tmp_path / "embed.parq"
+    path.write_bytes(b"a")
+    before = source_fingerprint(path)
+    path.write_bytes(b"ab")
+    assert source_fingerprint(path) != before
+    assert before["name"] == "embed.parq"
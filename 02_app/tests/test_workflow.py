@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from _core.config import config
+from _core.workflow import ResearchWorkflow
+
+
+@pytest.fixture
+def workflow():
+    return ResearchWorkflow(
+        docs=pd.DataFrame(),
+        workflow_config={},
+        model_config={},
+        search_backend=SimpleNamespace(),
+    )
+
+
+@pytest.fixture
+def results():
+    return pd.DataFrame(
+        {"identifier": ["a", "b", "c", "d"], "score": [1.0, 0.96, 0.5, 0.1]}
+    )
+
+
+def test_score_gate_is_off_by_default(workflow, results):
+    accepted, uncertain = workflow._gate_by_score(results)
+
+    assert accepted.empty
+    assert uncertain["identifier"].tolist() == ["a", "b", "c", "d"]
+
+
+def test_score_gate_accepts_checks_and_drops_by_threshold(
+    workflow, results, monkeypatch
+):
+    monkeypatch.setitem(config["relevance"]["score_gate"], "enabled", True)
+    monkeypatch.setitem(config["relevance"]["score_gate"], "accept_above", 0.95)
+    monkeypatch.setitem(config["relevance"]["score_gate"], "reject_below", 0.2)
+
+    accepted, uncertain = workflow._gate_by_score(results)
+
+    assert accepted["identifier"].tolist() == ["a", "b"]
+    assert accepted["relevance"].all()
+    assert uncertain["identifier"].tolist() == ["c"]
@@ -0,0 +1,90 @@
+"""
+Recall@k vs. memory of the quantized vector stores of the local search index.
+
+Run from 02_app:
+
+    python vector_quantization_report.py --queries 200 --k 10
+
+Queries are titles of sampled documents, embedded with the configured encoder.
+Each store is compared against exact float32 search over the embeddings parquet.
+"""
+
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from _core.config import config
+from _core.embeddings import get_encoder
+from _core.vector_store import FlatVectorStore, QuantizedVectorStore
+
+BASE_DIR = Path(__file__).resolve().parents[1]  # .../deep-research/
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    return np.argpartition(-scores, k - 1)[:k]
+
+
+def evaluate(store, queries: np.ndarray, exact: list, k: int) -> dict:
+    """Mean recall@k against the exact top k and mean query latency."""
+    recalls = []
+    start = time.perf_counter()
+    for query, expected in zip(queries, exact):
+        found = top_k(store.scores(query, k), k)
+        recalls.append(len(np.intersect1d(found, expected)) / len(expected))
+    latency = (time.perf_counter() - start) / len(queries)
+    return {
+        f"recall@{k}": float(np.mean(recalls)),
+        "ram_mb": store.memory_bytes / 1024 / 1024,
+        "bytes_per_vector": store.memory_bytes / len(store),
+        "latency_ms": latency * 1000,
+    }
+
+
+def report(n_queries: int, k: int, rescore_factors: list) -> pd.DataFrame:
+    embeddings_file = BASE_DIR / config["local_search"]["embeddings_file"]
+    chunks = pd.read_parquet(embeddings_file, columns=["title", "embeddings"])
+    vectors = np.vstack(chunks["embeddings"].to_numpy())
+    titles = chunks["title"].dropna().drop_duplicates()
+    titles = titles.sample(n=min(n_queries, len(titles)), random_state=0).tolist()
+    queries = get_encoder().embed(titles)
+    print(f"Vectors: {vectors.shape[0]} x {vectors.shape[1]}, queries: {len(queries)}")
+
+    flat = FlatVectorStore(vectors)
+    exact = [top_k(flat.scores(query, k), k) for query in queries]
+    rows = [{"store": "float32", "rescore_factor": None, **evaluate(flat, queries, exact, k)}]
+    for mode in ("int8", "binary"):
+        store = QuantizedVectorStore.build(vectors, mode)
+        for factor in rescore_factors:
+            store.rescore_factor = factor
+            rows.append(
+                {
+                    "store": mode,
+                    "rescore_factor": factor,
+                    **evaluate(store, queries, exact, k),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--rescore-factors", type=int, nargs="+", default=[1, 2, 4, 10]
+    )
+    args = parser.parse_args()
+    results = report(args.queries, args.k, args.rescore_factors)
+    print(results.round(3).to_string(index=False))
+    print(
+        "RAM counts vectors or codes held in memory. Rescoring reads the "
+        "float32 vectors from disk; in the app they are memory-mapped."
+    )
+
+
+if __name__ == "__main__":
+    main()